@@ -0,0 +1,411 @@
+"""
+Simulação em Lote (várias instâncias do mesmo programa em passo único)
+ - N instâncias com registradores próprios, guardados por coluna: regs[r][i] é o registrador r
+   da instância i
+ - O programa fica em uma imagem de memória compartilhada (somente leitura); cada instância guarda
+   apenas as palavras que ela mesma escreveu
+ - A cada passo as instâncias são agrupadas pelo PC: a instrução é decodificada uma única vez por
+   grupo e aplicada a cada instância do grupo em um laço Python comum (sem vetorização: o custo
+   por instância é o de um interpretador escalar, sem a busca, a decodificação e o despacho)
+ - Casos raros (erros, registradores inexistentes, desvio para fora da memória, opcode desconhecido,
+   código auto-modificado) passam a instância para uma CPU escalar, que termina a execução dela
+   com exatamente o mesmo comportamento
+"""
+
+from typing import Dict, List, Optional, Sequence
+from cpu import CPU, RunResult, STOP_HALT, STOP_BUDGET, STOP_ERROR
+from events import EventSink, NullSink, EV_HALT
+from loader import (MemoryLoader, CPUState, Flags, ADDRESS_BITS, REG_COUNT, WORD_MASK,
+                    ALU_LOGIC, ALU_ADD, ALU_SUB)
+from threaded import ESCREVEM_RC, HALT_WORD
+
+M = WORD_MASK
+
+
+def _signed(x: int) -> int:
+    """Interpreta uma palavra de 32 bits como inteiro com sinal (complemento de dois)."""
+    return x - 0x100000000 if x & 0x80000000 else x
+
+
+# Operações da ALU com dois operandos que deixam os flags como operação lógica
+_LOGICAS = {
+    4: lambda a, b: a ^ b,                          # XOR
+    5: lambda a, b: a | b,                          # OR
+    7: lambda a, b: a & b,                          # AND
+    8: lambda a, b: a << (b & 0x1F),                # ASL
+    9: lambda a, b: _signed(a) >> (b & 0x1F),       # ASR
+    10: lambda a, b: a << (b & 0x1F),               # LSL
+    11: lambda a, b: a >> (b & 0x1F),               # LSR
+    32: lambda a, b: _signed(a) * _signed(b),       # MUL
+}
+
+# Operações com um operando (flags de operação lógica)
+_UNARIAS = {
+    6: lambda a: ~a,                # NOT
+    12: lambda a: a,                # COPY
+    35: lambda a: _signed(a) + 1,   # INC
+    36: lambda a: _signed(a) - 1,   # DEC
+}
+
+
+class BatchCPU:
+    """
+    N instâncias do mesmo programa executadas juntas. Cada uma tem registradores, PC, IR,
+    flags e escritas de memória próprias; o resultado de cada instância é idêntico ao de
+    uma CPU escalar que começasse do mesmo estado.
+    """
+
+    def __init__(self, n: int, address_bits: int = ADDRESS_BITS, events: Optional[EventSink] = None):
+        """
+        Args:
+            n: Número de instâncias
+            address_bits: Largura do endereço de palavra (como na CPU)
+            events: Destino dos eventos (HALT, erros). O padrão descarta tudo
+        """
+        self.n = n
+        self.events: EventSink = events if events is not None else NullSink()
+        # Imagem compartilhada: programa e dados iniciais comuns a todas as instâncias
+        self.image = MemoryLoader("array", address_bits)
+        self.memory_size = self.image.memory_size
+        # Estado por instância
+        self.regs: List[List[int]] = [[0] * n for _ in range(REG_COUNT)]
+        self.pcs: List[int] = [0] * n
+        self.irs: List[int] = [0] * n
+        self.halted: List[bool] = [False] * n
+        self.flags: List[Flags] = [Flags() for _ in range(n)]
+        self.alu_pending: List[Optional[tuple]] = [None] * n
+        # Escritas de cada instância (endereço -> palavra), por cima da imagem compartilhada
+        self.overlays: List[Dict[int, int]] = [{} for _ in range(n)]
+        self.results: List[Optional[RunResult]] = [None] * n
+        # Coluna lida no lugar de R0 e de índices fora do banco
+        self._zero = [0] * n
+        # Endereços que alguma instância já sobrescreveu (conferidos na busca da instrução)
+        self._stored: set = set()
+        self._decoded: dict = {}
+        self._max_cycles = 0
+
+    # ---------- carga e estado inicial ----------
+    def load_from_file(self, filepath: str, verbose: bool = False):
+        """Carrega o programa (texto ou imagem binária) na imagem compartilhada e põe todos os PCs na entrada."""
+        loaded = self.image.load_from_file(filepath, verbose)
+        self._reset_code()
+        return loaded
+
+    def load_segments(self, segments, entry_pc: Optional[int] = None):
+        """Carrega segmentos (endereço, palavras) na imagem compartilhada."""
+        loaded = self.image.load_segments(segments)
+        if entry_pc is None:
+            entry_pc = max(loaded[0], 0)
+        self.image.state.pc = entry_pc
+        self._reset_code()
+        return loaded
+
+    def _reset_code(self):
+        self._decoded.clear()
+        self.pcs = [self.image.state.pc] * self.n
+
+    def write_reg(self, i: int, reg_index: int, value: int):
+        """Escreve um registrador da instância i (R0 ignora a escrita, como na CPU)."""
+        if not 0 <= reg_index < REG_COUNT:
+            raise IndexError(f"Register index out of range: {reg_index}")
+        if reg_index:
+            self.regs[reg_index][i] = value & M
+
+    def read_reg(self, i: int, reg_index: int) -> int:
+        if not 0 <= reg_index < REG_COUNT:
+            raise IndexError(f"Register index out of range: {reg_index}")
+        return self.regs[reg_index][i] if reg_index else 0
+
+    def set_registers(self, i: int, values: Sequence[int]):
+        """Define o banco de registradores inteiro da instância i (valores de 32 bits)."""
+        for r, value in enumerate(values):
+            self.regs[r][i] = value & M
+
+    def write_mem(self, i: int, address: int, value: int):
+        """Escreve uma palavra só na memória da instância i."""
+        self.image._check_address(address)
+        self.overlays[i][address] = value & M
+        self._stored.add(address)
+
+    def read_mem(self, i: int, address: int) -> int:
+        self.image._check_address(address)
+        value = self.overlays[i].get(address)
+        return self.image.memory[address] if value is None else value
+
+    def state(self, i: int) -> CPUState:
+        """Cópia do estado da instância i (os flags são calculados ao serem lidos)."""
+        flags = self.flags[i]
+        return CPUState(regs=[col[i] for col in self.regs], pc=self.pcs[i], ir=self.irs[i],
+                        flags=Flags(flags.neg, flags.zero, flags.carry, flags.overflow),
+                        halted=self.halted[i], alu_pending=self.alu_pending[i])
+
+    def to_cpu(self, i: int, events: Optional[EventSink] = None) -> CPU:
+        """CPU escalar com o estado e a memória da instância i."""
+        cpu = CPU(memory_backend="array", address_bits=self.image.address_bits,
+                  events=events if events is not None else self.events)
+        cpu.memory[:] = self.image.memory
+        cpu._modified_addresses.update(self.image._modified_addresses)
+        for address, value in self.overlays[i].items():
+            cpu.write_mem(address, value)
+        cpu.state = self.state(i)
+        return cpu
+
+    # ---------- execução ----------
+    def run(self, max_cycles: Optional[int] = None) -> List[RunResult]:
+        """
+        Executa todas as instâncias até o HALT (ou erro) de cada uma ou até `max_cycles`
+        ciclos (None = sem limite). Retorna um RunResult por instância.
+        """
+        limit = CPU._cycle_limit(max_cycles)
+        self._max_cycles = limit
+        self.results = [None] * self.n
+        # Grupos: (PC, IR) -> instâncias. O IR (última instrução executada) entra na chave
+        # para que ele não precise ser gravado instância por instância a cada passo
+        groups: Dict[tuple, List[int]] = {}
+        for i in range(self.n):
+            if self.halted[i]:
+                reason = STOP_HALT if self.irs[i] == HALT_WORD else STOP_ERROR
+                self.results[i] = RunResult(0, reason, self.pcs[i])
+            else:
+                groups.setdefault((self.pcs[i], self.irs[i]), []).append(i)
+
+        step = 0
+        while groups and step < limit:
+            proximos: Dict[tuple, List[int]] = {}
+            for (pc, ir), idx in groups.items():
+                for chave, membros in self._exec_group(pc, ir, idx, step):
+                    if chave in proximos:
+                        proximos[chave].extend(membros)
+                    else:
+                        proximos[chave] = membros
+            groups = proximos
+            step += 1
+
+        # Orçamento esgotado: grava PC/IR de quem ainda estava rodando
+        for (pc, ir), idx in groups.items():
+            for i in idx:
+                self.pcs[i] = pc
+                self.irs[i] = ir
+                self.results[i] = RunResult(step, STOP_BUDGET, pc)
+        return self.results
+
+    def _detach(self, idx: List[int], pc: int, ir: int, step: int):
+        """
+        Termina as instâncias em uma CPU escalar, a partir do estado de antes da instrução
+        em `pc` (já com `step` ciclos executados), e copia o estado final de volta.
+        """
+        image = self.image.memory
+        for i in idx:
+            self.pcs[i] = pc
+            self.irs[i] = ir
+            cpu = self.to_cpu(i)
+            cycles, reason = cpu._run_steps(step, self._max_cycles)
+            if reason is None:
+                reason = cpu._halt_reason() if cpu.state.halted else STOP_BUDGET
+            state = cpu.state
+            for r in range(REG_COUNT):
+                self.regs[r][i] = state.regs[r]
+            self.pcs[i] = state.pc
+            self.irs[i] = state.ir
+            self.halted[i] = state.halted
+            self.alu_pending[i] = state.alu_pending
+            self.flags[i] = state._flags
+            overlay = self.overlays[i]
+            for address in cpu._modified_addresses:
+                value = cpu.memory[address]
+                if address in overlay or value != image[address]:
+                    overlay[address] = value
+                    self._stored.add(address)
+            self.results[i] = RunResult(cycles, reason, state.pc)
+
+    def _exec_group(self, pc: int, ir: int, idx: List[int], step: int):
+        """
+        Executa a instrução em `pc` para as instâncias `idx` (o passo `step`): decodifica uma
+        vez e aplica a operação instância por instância sobre as colunas de registradores.
+        Retorna os novos grupos [((pc, ir), instâncias)] de quem continua rodando.
+        """
+        if pc in self._stored:
+            # Quem sobrescreveu este endereço executa a sua própria versão da instrução
+            overlays = self.overlays
+            proprias = [i for i in idx if pc in overlays[i]]
+            if proprias:
+                self._detach(proprias, pc, ir, step)
+                idx = [i for i in idx if pc not in overlays[i]]
+                if not idx:
+                    return ()
+        if not 0 <= pc < self.memory_size - 1:
+            # Busca fora da memória ou incremento do PC inválido: a CPU escalar reporta
+            self._detach(idx, pc, ir, step)
+            return ()
+
+        decoded = self._decoded.get(pc)
+        if decoded is None:
+            palavra = self.image.memory[pc]
+            decoded = self._decoded[pc] = (palavra, palavra >> 24, (palavra >> 16) & 0xFF,
+                                           (palavra >> 8) & 0xFF, palavra & 0xFF,
+                                           (palavra >> 8) & 0xFFFF, palavra & 0xFFFFFF)
+        palavra, opcode, ra, rb, rc, const16, addr24 = decoded
+        proximo = pc + 1
+
+        if palavra == HALT_WORD:
+            for i in idx:
+                self.halted[i] = True
+                self.pcs[i] = proximo
+                self.irs[i] = palavra
+                self.results[i] = RunResult(step + 1, STOP_HALT, proximo)
+                self.events.emit(EV_HALT, pc, f"PC({pc}): HALT encontrado.")
+            return ()
+        if (opcode in ESCREVEM_RC or opcode in (17, 19)) and rc >= REG_COUNT:
+            self._detach(idx, pc, ir, step)
+            return ()
+
+        regs = self.regs
+        zero = self._zero
+        A = regs[ra] if 0 < ra < 32 else zero
+        B = regs[rb] if 0 < rb < 32 else zero
+        C = regs[rc] if rc < 32 else zero
+        P = self.alu_pending
+        segue = ((proximo, palavra), idx)
+
+        if opcode in _LOGICAS:
+            f = _LOGICAS[opcode]
+            for i in idx:
+                res = f(A[i], B[i])
+                if rc:
+                    C[i] = res & M
+                P[i] = (res, ALU_LOGIC, 0, 0)
+        elif opcode == 1 or opcode == 2:    # ADD / SUB
+            kind = ALU_ADD if opcode == 1 else ALU_SUB
+            for i in idx:
+                a = A[i]
+                b = B[i]
+                res = a + b if opcode == 1 else a - b
+                if rc:
+                    C[i] = res & M
+                P[i] = (res, kind, a, b)
+        elif opcode in _UNARIAS:
+            f = _UNARIAS[opcode]
+            for i in idx:
+                res = f(A[i])
+                if rc:
+                    C[i] = res & M
+                P[i] = (res, ALU_LOGIC, 0, 0)
+        elif opcode == 3:   # ZEROS
+            for i in idx:
+                if rc:
+                    C[i] = 0
+                P[i] = (0, ALU_LOGIC, 0, 0)
+        elif opcode == 14:  # LCLH
+            if rc:
+                alto = const16 << 16
+                for i in idx:
+                    C[i] = (alto | (C[i] & 0x0000FFFF)) & M
+        elif opcode == 15:  # LCLL
+            if rc:
+                for i in idx:
+                    C[i] = ((C[i] & 0xFFFF0000) | const16) & M
+        elif opcode == 37:  # MOVI
+            if rc:
+                for i in idx:
+                    C[i] = const16
+        elif opcode == 38:  # NOTBIT (não altera flags)
+            if rc:
+                for i in idx:
+                    C[i] = ~(A[i] & B[i]) & M
+        elif opcode == 39:  # NOP
+            pass
+        elif opcode == 16:  # LOAD
+            image = self.image.memory
+            overlays = self.overlays
+            size = self.memory_size
+            invalidos = []
+            ok = []
+            for i in idx:
+                a = A[i]
+                if a >= size:
+                    invalidos.append(i)
+                    continue
+                ok.append(i)
+                if rc:
+                    valor = overlays[i].get(a)
+                    C[i] = image[a] if valor is None else valor
+            if invalidos:
+                self._detach(invalidos, pc, ir, step)
+                segue = ((proximo, palavra), ok)
+        elif opcode == 17:  # STORE
+            overlays = self.overlays
+            size = self.memory_size
+            stored = self._stored
+            invalidos = []
+            ok = []
+            for i in idx:
+                a = C[i] if rc else 0
+                if a >= size:
+                    invalidos.append(i)
+                    continue
+                ok.append(i)
+                overlays[i][a] = A[i]
+                stored.add(a)
+            # Escrita sobre código: quem executar o endereço depois é desviado na busca
+            if invalidos:
+                self._detach(invalidos, pc, ir, step)
+                segue = ((proximo, palavra), ok)
+        elif opcode in (33, 34):    # DIV / MOD
+            invalidos = []
+            ok = []
+            for i in idx:
+                sb = _signed(B[i])
+                if sb == 0:
+                    invalidos.append(i)
+                    continue
+                ok.append(i)
+                sa = _signed(A[i])
+                if opcode == 33:
+                    res = int(sa / sb)
+                    if rc:
+                        C[i] = res & M
+                    P[i] = (res, ALU_LOGIC, 0, 0)
+                elif rc:
+                    C[i] = (sa % sb) & M
+            if invalidos:
+                self._detach(invalidos, pc, ir, step)
+                segue = ((proximo, palavra), ok)
+        elif opcode == 18 or opcode == 22:  # JAL / J
+            if addr24 >= self.memory_size:
+                self._detach(idx, pc, ir, step)
+                return ()
+            if opcode == 18:
+                r31 = regs[31]
+                for i in idx:
+                    r31[i] = proximo
+            segue = ((addr24, palavra), idx)
+        elif opcode == 19:  # JR
+            size = self.memory_size
+            invalidos = []
+            destinos: Dict[int, List[int]] = {}
+            for i in idx:
+                alvo = C[i] if rc else 0
+                if alvo >= size:
+                    invalidos.append(i)
+                else:
+                    destinos.setdefault(alvo, []).append(i)
+            if invalidos:
+                self._detach(invalidos, pc, ir, step)
+            return [((alvo, palavra), membros) for alvo, membros in destinos.items()]
+        elif opcode == 20 or opcode == 21:  # BEQ / BNE
+            iguais = []
+            diferentes = []
+            for i in idx:
+                (iguais if A[i] == B[i] else diferentes).append(i)
+            desvia, segue_reto = (iguais, diferentes) if opcode == 20 else (diferentes, iguais)
+            novos = []
+            if desvia:
+                novos.append(((rc, palavra), desvia))
+            if segue_reto:
+                novos.append(((proximo, palavra), segue_reto))
+            return novos
+        else:
+            # Opcode desconhecido (a CPU escalar emite o aviso e segue)
+            self._detach(idx, pc, ir, step)
+            return ()
+        return [segue] if segue[1] else ()
@@ -0,0 +1,452 @@
+"""
+Benchmarks do Simulador UFLA-RISC
+ - Mede o custo por instrução do núcleo de execução em laços longos
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from typing import List
+from batch import BatchCPU
+from cpu import CPU
+from cpu_logged import CPULogged
+from events import ConsoleSink, CounterSink, NullSink
+from loader import ADDRESS_BITS, MEMORY_BACKENDS, MEMORY_SIZE, write_image
+from interpretador import CacheMontagem, assemble, montar_instrucao, montar_segmentos
+from test_framework import TestFramework
+from pool import Job, run_jobs
+
+# Laço de referência: 6 instruções por iteração, mistura de ALU, NOP e desvio
+PROGRAMA_LACO = [
+    "address 0",
+    "movi r1, 50000",   # contador de iterações
+    "movi r2, 3",
+    "add r3, r3, r2",   # endereço 2: início do laço
+    "xor r4, r3, r1",
+    "mul r5, r2, r2",
+    "nop",
+    "dec r1, r1",
+    "bne r1, r0, 2",
+    "halt",
+]
+
+
+def carregar_programa(cpu: CPU, assembly_code: List[str]):
+    """Monta as linhas de assembly e carrega as palavras direto na memória da CPU (sem arquivos)."""
+    cpu.load_program(montar_segmentos(assembly_code))
+
+
+# Programa curto para execuções em lote: 5 instruções até o HALT
+PROGRAMA_CURTO = [
+    "movi r1, 7",
+    "movi r2, 5",
+    "add r3, r1, r2",
+    "mul r4, r3, r3",
+    "halt",
+]
+
+
+def executar(cpu: CPU, engine: str):
+    """Roda a CPU até o HALT (sem orçamento de ciclos), sem nenhuma saída de console."""
+    cpu.events = NullSink()
+    return cpu.run(engine=engine)
+
+
+def bench_dispatch(repeticoes: int = 5) -> float:
+    """
+    Executa o laço de referência no interpretador (step) até o HALT e retorna o
+    melhor tempo por instrução (em nanossegundos).
+    """
+    melhor = None
+    for _ in range(repeticoes):
+        cpu = CPU()
+        carregar_programa(cpu, PROGRAMA_LACO)
+        inicio = time.perf_counter()
+        instrucoes = executar(cpu, "interp").cycles
+        decorrido = time.perf_counter() - inicio
+        ns = decorrido / instrucoes * 1e9
+        melhor = ns if melhor is None else min(melhor, ns)
+    stats = cpu.decode_cache_stats()
+    print(f"[dispatch] {instrucoes} instruções, {melhor:.0f} ns/instrução "
+          f"(cache de decodificação: {stats['hits']} acertos, {stats['misses']} faltas, "
+          f"{stats['hit_rate']*100:.3f}%)")
+    return melhor
+
+
+def bench_engines(repeticoes: int = 5) -> dict:
+    """
+    Compara os motores de execução no laço de referência. Retorna {motor: ns por instrução}.
+    """
+    resultados = {"interp": bench_dispatch(repeticoes)}
+    for engine in ("threaded", "jit"):
+        melhor = None
+        for _ in range(repeticoes):
+            cpu = CPU()
+            carregar_programa(cpu, PROGRAMA_LACO)
+            inicio = time.perf_counter()
+            instrucoes = executar(cpu, engine).cycles
+            decorrido = time.perf_counter() - inicio
+            ns = decorrido / instrucoes * 1e9
+            melhor = ns if melhor is None else min(melhor, ns)
+        compilados = sum(1 for b in cpu._blocks.values() if b is not None and b.compilado)
+        print(f"[{engine}] {instrucoes} instruções, {melhor:.0f} ns/instrução "
+              f"({len(cpu._blocks)} blocos traduzidos, {compilados} compilados)")
+        resultados[engine] = melhor
+    return resultados
+
+
+def bench_memoria(repeticoes: int = 200) -> dict:
+    """
+    Compara os backends de memória: tempo de criação de uma CPU, espaço ocupado
+    pela memória principal e tempo para zerá-la no lugar (reset_memory).
+    Inclui a memória paginada com endereço de 24 bits (16M palavras).
+    """
+    resultados = {}
+    configuracoes = [(backend, ADDRESS_BITS) for backend in MEMORY_BACKENDS] + [("paged", 24)]
+    for backend, address_bits in configuracoes:
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            cpu = CPU(memory_backend=backend, address_bits=address_bits)
+        criacao = (time.perf_counter() - inicio) / repeticoes * 1e6
+        carregar_programa(cpu, PROGRAMA_LACO)
+        # Lista: vetor de ponteiros + inteiros distintos (fora os pequenos, que são compartilhados)
+        ocupado = sys.getsizeof(cpu.memory)
+        if backend == "list":
+            ocupado += sum(sys.getsizeof(w) for w in set(cpu.memory) if not -5 <= w <= 256)
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            cpu.reset_memory()
+        reset = (time.perf_counter() - inicio) / repeticoes * 1e6
+        print(f"[memória:{backend}/{address_bits} bits] criação da CPU {criacao:.0f} us, "
+              f"memória {ocupado / 1024:.0f} KiB, reset_memory {reset:.0f} us")
+        resultados[(backend, address_bits)] = {"criacao_us": criacao, "bytes": ocupado, "reset_us": reset}
+    return resultados
+
+
+def bench_carregamento(repeticoes: int = 3) -> dict:
+    """
+    Carrega uma imagem de memória cheia (64K palavras aleatórias) no formato texto
+    (linha a linha e em bloco) e no formato de imagem binária. Retorna {formato: ms por carga}.
+    """
+    rnd = random.Random(0)
+    palavras = [rnd.getrandbits(32) for _ in range(MEMORY_SIZE)]
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        texto = os.path.join(pasta, "cheia.bin")
+        arquivos = {"texto linha a linha": texto, "texto": texto,
+                    "imagem": os.path.join(pasta, "cheia.img")}
+        with open(texto, "w") as f:
+            f.write("address 0000000000000000\n")
+            f.writelines(f"{w:032b}\n" for w in palavras)
+        write_image(arquivos["imagem"], [(0, palavras)])
+        for formato, caminho in arquivos.items():
+            melhor = None
+            for _ in range(repeticoes):
+                cpu = CPU()
+                inicio = time.perf_counter()
+                if formato == "texto linha a linha":
+                    cpu._load_text_by_line(caminho)
+                else:
+                    cpu.load_from_file(caminho)
+                ms = (time.perf_counter() - inicio) * 1e3
+                melhor = ms if melhor is None else min(melhor, ms)
+            assert cpu.memory == palavras
+            print(f"[carga:{formato}] {len(palavras)} palavras, {os.path.getsize(caminho) / 1024:.0f} KiB, "
+                  f"{melhor:.1f} ms")
+            resultados[formato] = melhor
+    return resultados
+
+
+def bench_eventos(execucoes: int = 5000) -> dict:
+    """
+    Executa o programa curto muitas vezes com cada destino de eventos: o console
+    (redirecionado para /dev/null), só contagem e descarte. Retorna {destino: us por execução}.
+    """
+    cpu = CPU()
+    carregar_programa(cpu, PROGRAMA_CURTO)
+    resultados = {}
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for nome, sink in (("console", ConsoleSink()), ("counter", CounterSink()), ("null", NullSink())):
+            cpu.events = sink
+            inicio = time.perf_counter()
+            for _ in range(execucoes):
+                cpu.state.pc = 0
+                cpu.state.halted = False
+                cpu.run()
+            resultados[nome] = (time.perf_counter() - inicio) / execucoes * 1e6
+    for nome, us in resultados.items():
+        print(f"[eventos:{nome}] {execucoes} execuções, {us:.1f} us por execução")
+    return resultados
+
+
+# Varredura de parâmetros: R1 (definido por instância) é o número de iterações
+PROGRAMA_VARREDURA = [
+    "movi r2, 3",
+    "add r3, r3, r2",   # endereço 1: início do laço
+    "xor r4, r3, r1",
+    "mul r5, r2, r3",
+    "dec r1, r1",
+    "bne r1, r0, 1",
+    "halt",
+]
+
+
+def bench_lote(instancias: int = 200, iteracoes: int = 500) -> dict:
+    """
+    Roda a varredura de parâmetros (R1 = iteracoes + i na instância i) em N CPUs
+    separadas e em uma BatchCPU (decodificação por grupo, execução por instância em um
+    laço escalar). Retorna {modo: ns por instrução}.
+    """
+    cpu = CPU()
+    carregar_programa(cpu, PROGRAMA_VARREDURA)
+    programa = [(0, list(cpu.memory[:len(PROGRAMA_VARREDURA)]))]
+    resultados = {}
+
+    inicio = time.perf_counter()
+    esperado = []
+    instrucoes = 0
+    for i in range(instancias):
+        cpu = CPU(events=NullSink())
+        cpu.load_segments(programa)
+        cpu.write_reg(1, iteracoes + i)
+        instrucoes += cpu.run().cycles
+        esperado.append(cpu.state.regs)
+    resultados["escalar"] = (time.perf_counter() - inicio) / instrucoes * 1e9
+
+    inicio = time.perf_counter()
+    lote = BatchCPU(instancias)
+    lote.load_segments(programa)
+    for i in range(instancias):
+        lote.write_reg(i, 1, iteracoes + i)
+    lote.run()
+    resultados["lote"] = (time.perf_counter() - inicio) / instrucoes * 1e9
+    assert [lote.state(i).regs for i in range(instancias)] == esperado
+
+    for modo, ns in resultados.items():
+        print(f"[lote:{modo}] {instancias} instâncias, {instrucoes} instruções, {ns:.0f} ns/instrução")
+    print(f"[lote] decodificação compartilhada: {resultados['escalar'] / resultados['lote']:.1f}x "
+          f"mais rápido que CPUs escalares separadas")
+    return resultados
+
+
+def bench_pool(trabalhos: int = 64, iteracoes: int = 2000) -> dict:
+    """
+    Distribui a varredura de parâmetros como trabalhos independentes em um pool de
+    processos, com 1 processo e com um por núcleo. Retorna {processos: trabalhos por segundo}.
+    """
+    cpu = CPU()
+    carregar_programa(cpu, PROGRAMA_VARREDURA)
+    programas = {"varredura": [(0, list(cpu.memory[:len(PROGRAMA_VARREDURA)]))]}
+    jobs = [Job("varredura", regs=[0, iteracoes + i] + [0] * 30) for i in range(trabalhos)]
+    resultados = {}
+    for processos in sorted({1, os.cpu_count() or 1}):
+        inicio = time.perf_counter()
+        instrucoes = sum(r.cycles for r in run_jobs(programas, jobs, workers=processos))
+        decorrido = time.perf_counter() - inicio
+        resultados[processos] = trabalhos / decorrido
+        print(f"[pool:{processos} processos] {trabalhos} trabalhos, {instrucoes} instruções, "
+              f"{trabalhos / decorrido:.1f} trabalhos/s")
+    return resultados
+
+
+def bench_testes(testes: int = 200) -> dict:
+    """
+    Cria e executa um corpus de testes gerados pelo TestFramework com artefatos em disco
+    (.asm, .bin e _log.txt) e só em memória. Retorna {modo: ms por teste}.
+    """
+    rnd = random.Random(0)
+    corpus = [[f"movi r{r}, {rnd.randrange(1000)}" for r in range(1, 9)] +
+              ["add r9, r1, r2", "mul r10, r3, r4", "xor r11, r5, r6", "halt"]
+              for _ in range(testes)]
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta, open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for modo, gravar in (("arquivos", True), ("memória", False)):
+            framework = TestFramework(output_dir=pasta, engines=(), save_logs=gravar, save_files=gravar)
+            inicio = time.perf_counter()
+            for i, codigo in enumerate(corpus):
+                bin_path = framework.create_test_program(f"t{i}", codigo, {})
+                framework.run_test(f"t{i}", bin_path, {})
+            resultados[modo] = (time.perf_counter() - inicio) / testes * 1e3
+            assert all(r["passed"] for r in framework.test_results)
+    for modo, ms in resultados.items():
+        print(f"[testes:{modo}] {testes} testes, {ms:.2f} ms por teste")
+    return resultados
+
+
+def bench_montagem(linhas: int = MEMORY_SIZE, repeticoes: int = 3) -> dict:
+    """
+    Monta um arquivo fonte de 64K linhas pelo caminho de texto (montar_instrucao gera
+    a string de 32 bits e int(b, 2) a converte de volta) e em bloco com assemble().
+    Retorna {caminho: linhas por segundo}.
+    """
+    rnd = random.Random(0)
+    formatos = ["add r{}, r{}, r{}", "xor r{}, r{}, r{}", "mul r{}, r{}, r{}",
+                "movi r{}, {}", "lcll r{}, {}", "beq r{}, r{}, {}", "j {}"]
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        fonte = os.path.join(pasta, "fonte.asm")
+        with open(fonte, "w") as f:
+            f.write("address 0\n")
+            for _ in range(linhas - 1):
+                formato = rnd.choice(formatos)
+                f.write(formato.format(*(rnd.randrange(32) for _ in range(formato.count("{}")))) + "\n")
+        for caminho in ("texto", "assemble"):
+            melhor = None
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                with open(fonte) as f:
+                    if caminho == "texto":
+                        palavras = [int(b, 2) for b in map(montar_instrucao, f)
+                                    if b and not b.startswith("address")]
+                    else:
+                        palavras = assemble(f)
+                decorrido = time.perf_counter() - inicio
+                melhor = decorrido if melhor is None else min(melhor, decorrido)
+            resultados[caminho] = linhas / melhor
+            print(f"[montagem:{caminho}] {len(palavras)} palavras, {linhas / melhor:.0f} linhas/s")
+    return resultados
+
+
+def bench_cache_montagem(linhas: int = MEMORY_SIZE) -> dict:
+    """
+    Monta um fonte de 64K linhas pelo cache de montagem: a primeira vez (falta, monta e
+    grava) e de novo com o fonte inalterado (acerto). Retorna {falta/acerto: ms}.
+    """
+    rnd = random.Random(0)
+    fonte = [f"add r{rnd.randrange(32)}, r{rnd.randrange(32)}, r{rnd.randrange(32)}" for _ in range(linhas)]
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        cache = CacheMontagem(pasta)
+        for caso in ("falta", "acerto"):
+            inicio = time.perf_counter()
+            programa = cache.montar(fonte)
+            resultados[caso] = (time.perf_counter() - inicio) * 1e3
+        assert cache.stats()["hits"] == 1 and len(programa.segmentos[0][1]) == linhas
+    for caso, ms in resultados.items():
+        print(f"[cache de montagem:{caso}] {linhas} linhas, {ms:.1f} ms")
+    return resultados
+
+
+def bench_logging(ciclos: int = 50000, repeticoes: int = 3) -> dict:
+    """
+    Custo por ciclo de CPULogged.run no laço de referência com o logging ligado
+    (guardando os logs, sem imprimir) e desligado. Retorna {modo: us por ciclo}.
+    """
+    resultados = {}
+    for nome, ligado in (("ligado", True), ("desligado", False)):
+        melhor = float("inf")
+        for _ in range(repeticoes):
+            cpu = CPULogged(enable_logging=ligado, events=NullSink())
+            carregar_programa(cpu, PROGRAMA_LACO)
+            inicio = time.perf_counter()
+            resultado = cpu.run(max_cycles=ciclos)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        resultados[nome] = melhor / resultado.cycles * 1e6
+        print(f"[logging:{nome}] {resultado.cycles} ciclos, {resultados[nome]:.2f} us/ciclo")
+    return resultados
+
+
+def programa_preenchimento(palavras: int, inicio: int = 1024) -> List[str]:
+    """Laço que escreve `palavras` endereços distintos a partir de `inicio` (3 instruções por palavra)."""
+    return [
+        "address 0",
+        f"movi r1, {inicio}",
+        f"movi r2, {inicio + palavras}",
+        "store r1, r1",     # endereço 2: MEM[r1] = r1
+        "inc r1, r1",
+        "bne r1, r2, 2",
+        "halt",
+    ]
+
+
+def bench_log_memoria(tamanhos=(1000, 2000, 4000, 8000)) -> dict:
+    """
+    Custo do logging em um laço que preenche a memória: com a varredura de todos os
+    endereços já escritos o custo por ciclo cresce com o número de escritas (total
+    quadrático); com a lista de escritas do ciclo ele fica constante (total linear).
+    Retorna {palavras: us por ciclo}.
+    """
+    resultados = {}
+    for palavras in tamanhos:
+        cpu = CPULogged(events=NullSink())
+        carregar_programa(cpu, programa_preenchimento(palavras))
+        inicio = time.perf_counter()
+        resultado = cpu.run()
+        total = time.perf_counter() - inicio
+        resultados[palavras] = total / resultado.cycles * 1e6
+        print(f"[log:memória] {palavras} palavras escritas, {resultado.cycles} ciclos, "
+              f"{total * 1e3:.0f} ms ({resultados[palavras]:.1f} us/ciclo)")
+    return resultados
+
+
+def _log_em_memoria(ciclos: int, pasta: str) -> tuple:
+    """Referência dos benchmarks de log: StateLogger em memória + save_execution_log. (s, bytes)"""
+    cpu = CPULogged(events=NullSink())
+    carregar_programa(cpu, PROGRAMA_LACO)
+    caminho = os.path.join(pasta, "memoria_log.txt")
+    inicio = time.perf_counter()
+    cpu.run(max_cycles=ciclos)
+    with open(os.devnull, "w") as nulo, redirect_stdout(nulo):
+        cpu.save_execution_log(caminho)
+    return time.perf_counter() - inicio, os.path.getsize(caminho)
+
+
+def bench_trace(ciclos: int = 50000) -> dict:
+    """
+    Trace binário (trace_path, sem o log em texto) contra o log em memória salvo depois
+    com save_execution_log, no laço de referência. Retorna {modo: (us por ciclo, bytes)}.
+    """
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        tempo, tamanho = _log_em_memoria(ciclos, pasta)
+        resultados["memoria"] = (tempo / ciclos * 1e6, tamanho)
+        caminho = os.path.join(pasta, "execucao.trace")
+        cpu = CPULogged(enable_logging=False, trace_path=caminho, events=NullSink())
+        carregar_programa(cpu, PROGRAMA_LACO)
+        inicio = time.perf_counter()
+        cpu.run(max_cycles=ciclos)
+        resultados["trace"] = ((time.perf_counter() - inicio) / ciclos * 1e6, os.path.getsize(caminho))
+    for nome, (us, tamanho) in resultados.items():
+        print(f"[trace:{nome}] {ciclos} ciclos, {us:.2f} us/ciclo, {tamanho / 1024:.0f} KiB")
+    return resultados
+
+
+def bench_log_stream(ciclos: int = 50000, extensoes=(".txt", ".txt.gz", ".txt.xz")) -> dict:
+    """
+    Log em texto escrito em fluxo (log_path, sem e com compressão) contra o log em
+    memória salvo depois com save_execution_log, no laço de referência.
+    Retorna {modo: (us por ciclo, bytes)}.
+    """
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        tempo, tamanho = _log_em_memoria(ciclos, pasta)
+        resultados["memoria"] = (tempo / ciclos * 1e6, tamanho)
+        for extensao in extensoes:
+            caminho = os.path.join(pasta, "fluxo_log" + extensao)
+            cpu = CPULogged(log_path=caminho, events=NullSink())
+            carregar_programa(cpu, PROGRAMA_LACO)
+            inicio = time.perf_counter()
+            cpu.run(max_cycles=ciclos)
+            resultados[extensao] = ((time.perf_counter() - inicio) / ciclos * 1e6, os.path.getsize(caminho))
+    for nome, (us, tamanho) in resultados.items():
+        print(f"[log:fluxo {nome}] {ciclos} ciclos, {us:.2f} us/ciclo, {tamanho / 1024:.0f} KiB")
+    return resultados
+
+
+if __name__ == "__main__":
+    bench_engines()
+    bench_memoria()
+    bench_carregamento()
+    bench_eventos()
+    bench_lote()
+    bench_pool()
+    bench_testes()
+    bench_montagem()
+    bench_cache_montagem()
+    bench_logging()
+    bench_log_memoria()
+    bench_trace()
+    bench_log_stream()
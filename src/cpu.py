@@ -1,4 +1,34 @@
-from loader import MemoryLoader, MEMORY_SIZE, WORD_MASK
+import sys
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Optional
+from events import (EventSink, ConsoleSink, EV_RUN_START, EV_RUN_END, EV_HALT, EV_ERROR,
+                    EV_WARNING, EV_BREAKPOINT)
+from loader import MemoryLoader, RegisterIndexError, ADDRESS_BITS, ALU_LOGIC, ALU_ADD, ALU_SUB, ALU_EXPLICIT
+from threaded import traduzir_bloco
+from jit import JIT_THRESHOLD, compilar_bloco
+
+# Motores de execução disponíveis em run()
+ENGINES = ("interp", "threaded", "jit")
+
+# Motivos de parada de run() (RunResult.reason)
+STOP_HALT = "halt"                      # instrução HALT
+STOP_BUDGET = "budget"                  # orçamento de ciclos esgotado
+STOP_DEADLINE = "deadline"              # tempo limite (relógio de parede) atingido
+STOP_ERROR = "error"                    # erro de execução (acesso inválido, divisão por zero, registrador inexistente)
+STOP_PC_OUT_OF_RANGE = "pc_out_of_range"  # busca ou desvio para fora da memória
+STOP_BREAKPOINT = "breakpoint"          # PC chegou a um breakpoint
+
+# Com tempo limite, o relógio é consultado a cada fatia deste número de ciclos
+DEADLINE_SLICE = 10000
+
+@dataclass
+class RunResult:
+    """Resultado de run(): ciclos executados, motivo da parada (STOP_*) e PC final."""
+    cycles: int
+    reason: str
+    pc: int
 
 class CPU(MemoryLoader):
     """
@@ -6,9 +36,17 @@ class CPU(MemoryLoader):
     (Herda de MemoryLoader para ter acesso direto a memória e registradores)
     """
 
-    def __init__(self):
+    # Texto do evento EV_RUN_START ({pc} = PC inicial)
+    RUN_START_MESSAGE = "--- Iniciando Execução (PC Inicial: {pc}) ---"
+
+    def __init__(self, memory_backend: str = "list", address_bits: int = ADDRESS_BITS,
+                 events: Optional[EventSink] = None):
         # Inicializa a memória e estados (feito pelo MemoryLoader)
-        super().__init__()
+        super().__init__(memory_backend, address_bits)
+
+        # Destino dos eventos de execução (HALT, erros, avisos). O padrão imprime no
+        # console; NullSink/CounterSink/ListSink executam sem nenhuma saída
+        self.events: EventSink = events if events is not None else ConsoleSink()
         
         # Mapeamento pra debug
         self.OPCODE_NAMES = {
@@ -21,255 +59,443 @@ class CPU(MemoryLoader):
             255: "HALT" 
         }
 
-    def run(self): # Loop principal do processador. Executa instruções até encontrar a parada (HALT)
+        # Tabela de despacho: opcode -> método tratador (montada uma única vez)
+        self._dispatch = self._build_dispatch_table()
+
+        # Blocos básicos traduzidos (motor "threaded"): PC de entrada -> Bloco (ou None se
+        # a instrução de entrada não tem tradução) e endereço -> entradas dos blocos que o cobrem
+        self._blocks: dict = {}
+        self._block_owners: dict = {}
+
+        # Endereços em que run() para antes de executar a instrução
+        self.breakpoints: set = set()
+
+    def run(self, engine: str = "interp", max_cycles: Optional[int] = None,
+            deadline: Optional[float] = None) -> RunResult: # Loop principal do processador. Executa instruções até encontrar a parada (HALT)
+        """
+        Args:
+            engine: "interp" executa instrução a instrução (step); "threaded" executa
+                    blocos básicos traduzidos para closures; "jit" compila para código
+                    Python nativo os blocos que passam de JIT_THRESHOLD execuções.
+                    Todos produzem o mesmo estado final.
+            max_cycles: Orçamento de ciclos (None = sem limite)
+            deadline: Tempo máximo de execução em segundos, no relógio de parede (None = sem limite)
+
+        Returns:
+            RunResult com os ciclos executados, o motivo da parada e o PC final
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Motor de execução desconhecido: '{engine}'. Opções: {ENGINES}")
+        limit = self._cycle_limit(max_cycles)
     
-        print(f"--- Iniciando Execução (PC Inicial: {self.state.pc}) ---")
+        self.events.emit(EV_RUN_START, self.state.pc, self.RUN_START_MESSAGE.format(pc=self.state.pc))
         
+        end_time = None if deadline is None else time.monotonic() + deadline
         cycle_count = 0
-       
-        # O loop roda enquanto halted for FALSE
-        while not self.state.halted:
-            self.step()
-            cycle_count += 1
-            
-            # Limite para impedir loop infinito
-            if cycle_count > 5000:
-                print("AVISO: Limite de ciclos de segurança atingido (Loop infinito?)")
-                break
+        reason = None
+        while reason is None:
+            # O orçamento é conferido pelos próprios laços (por bloco nos motores de blocos);
+            # com tempo limite, a execução anda em fatias e o relógio é lido entre elas
+            target = limit if end_time is None else min(limit, cycle_count + DEADLINE_SLICE)
+            if engine == "interp":
+                cycle_count, reason = self._run_steps(cycle_count, target)
+            else:
+                cycle_count, reason = self._run_blocks(cycle_count, target, jit=(engine == "jit"))
+            if reason is None:
+                if self.state.halted:
+                    reason = self._halt_reason()
+                elif cycle_count >= limit:
+                    reason = STOP_BUDGET
+                elif end_time is not None and time.monotonic() >= end_time:
+                    reason = STOP_DEADLINE
+        self._report_stop(reason, max_cycles, deadline)
         
-        print(f"--- Execução Finalizada em {cycle_count} ciclos ---")
+        self.events.emit(EV_RUN_END, self.state.pc,
+                         f"--- Execução Finalizada em {cycle_count} ciclos ---")
+        return RunResult(cycle_count, reason, self.state.pc)
+
+    @staticmethod
+    def _cycle_limit(max_cycles: Optional[int]) -> int:
+        """Converte o orçamento de ciclos de run() em um limite numérico (None = sem limite)."""
+        if max_cycles is None:
+            return sys.maxsize
+        if max_cycles < 0:
+            raise ValueError(f"Orçamento de ciclos inválido: {max_cycles}")
+        return max_cycles
+
+    def _halt_reason(self) -> str:
+        """Motivo de uma parada com halted=True: HALT ou erro de execução."""
+        return STOP_HALT if self.state.ir == 0xFFFFFFFF else STOP_ERROR
+
+    def _report_stop(self, reason: str, max_cycles: Optional[int], deadline: Optional[float]):
+        """Avisos de parada por orçamento ou tempo limite."""
+        if reason == STOP_BUDGET:
+            self.events.emit(EV_WARNING, self.state.pc, f"AVISO: Orçamento de {max_cycles} ciclos esgotado.")
+        elif reason == STOP_DEADLINE:
+            self.events.emit(EV_WARNING, self.state.pc, f"AVISO: Tempo limite de {deadline}s atingido.")
+
+    def _index_error_stop(self, error: IndexError) -> str:
+        """Motivo de parada para um IndexError que escapou da execução (registrador ou PC)."""
+        if isinstance(error, RegisterIndexError):
+            self.events.emit(EV_ERROR, self.state.pc, f"Erro: Registrador inválido ({error})")
+            return STOP_ERROR
+        self.events.emit(EV_ERROR, self.state.pc, f"Erro: PC fora da memória ({error})")
+        return STOP_PC_OUT_OF_RANGE
+
+    def _run_steps(self, cycle_count: int, max_cycles: int):
+        """
+        Executa instrução a instrução (step) a partir de `cycle_count` ciclos já
+        executados, até o HALT, um breakpoint ou `max_cycles`.
+        Retorna (ciclos, motivo) com motivo None, STOP_BREAKPOINT, STOP_ERROR (registrador
+        inexistente) ou STOP_PC_OUT_OF_RANGE.
+        """
+        state = self.state
+        step = self.step
+        breakpoints = self.breakpoints
+        try:
+            if breakpoints:
+                while not state.halted and cycle_count < max_cycles:
+                    if cycle_count and self._at_breakpoint():
+                        return cycle_count, STOP_BREAKPOINT
+                    step()
+                    cycle_count += 1
+            elif not state.halted:
+                # O próprio range conta os ciclos: só o HALT é conferido por instrução
+                for cycle_count in range(cycle_count + 1, max_cycles + 1):
+                    step()
+                    if state.halted:
+                        break
+        except IndexError as e:
+            if not breakpoints:
+                cycle_count -= 1    # a instrução que falhou não conta
+            return cycle_count, self._index_error_stop(e)
+        return cycle_count, None
+
+    def _at_breakpoint(self) -> bool:
+        """True se o PC atual é um breakpoint (a instrução ainda não foi executada)."""
+        if self.state.pc in self.breakpoints:
+            self.events.emit(EV_BREAKPOINT, self.state.pc, f"Breakpoint atingido em PC={self.state.pc}")
+            return True
+        return False
+
+    def _run_blocks(self, cycle_count: int, max_cycles: int, jit: bool = False):
+        """
+        Executa por blocos básicos a partir de `cycle_count` ciclos já executados, até o
+        HALT, um breakpoint ou `max_cycles` ciclos. O orçamento só é conferido na entrada
+        de cada bloco: um bloco só roda inteiro se couber nele e não contiver breakpoint;
+        senão, cai para o step (execução ciclo a ciclo). No modo jit, blocos com mais
+        de JIT_THRESHOLD execuções são compilados e recebem o orçamento restante.
+        Retorna (ciclos, motivo) com motivo None, STOP_BREAKPOINT, STOP_ERROR (registrador
+        inexistente) ou STOP_PC_OUT_OF_RANGE.
+        """
+        blocks = self._blocks
+        state = self.state
+        breakpoints = self.breakpoints
+        block = None
+        try:
+            while not state.halted and cycle_count < max_cycles:
+                pc = state.pc
+                if pc in blocks:
+                    block = blocks[pc]
+                else:
+                    block = self._translate_block(pc)
+                if breakpoints:
+                    if cycle_count and self._at_breakpoint():
+                        return cycle_count, STOP_BREAKPOINT
+                    if block is not None and not breakpoints.isdisjoint(range(block.inicio + 1, block.fim + 1)):
+                        block = None
+                if block is None or block.tamanho > max_cycles - cycle_count:
+                    block = None
+                    self.step()
+                    cycle_count += 1
+                elif jit and not (breakpoints and block.inicio in breakpoints):
+                    # (Um laço compilado volta ao próprio início sem sair; com breakpoint
+                    # no início, o bloco roda uma vez pela tradução threaded)
+                    if block.compilado is None:
+                        block.execucoes += 1
+                        if block.execucoes < JIT_THRESHOLD:
+                            cycle_count += block.executar()
+                            continue
+                        compilar_bloco(self, block)
+                    cycle_count += block.compilado(max_cycles - cycle_count)
+                else:
+                    cycle_count += block.executar()
+        except IndexError as e:
+            # Só o desvio final de um bloco sai da memória: as instruções antes dele contam
+            if block is not None:
+                cycle_count += block.tamanho - 1
+            return cycle_count, self._index_error_stop(e)
+        return cycle_count, None
+
+    def _translate_block(self, pc: int):
+        """Traduz o bloco que começa em `pc` e o registra no cache (e nos endereços que cobre)."""
+        block = traduzir_bloco(self, pc) if 0 <= pc < self.memory_size else None
+        self._blocks[pc] = block
+        fim = block.fim if block is not None else pc
+        for addr in range(pc, fim + 1):
+            self._block_owners.setdefault(addr, set()).add(pc)
+        # Garante que uma escrita no PC de entrada invalide também a marca "sem tradução"
+        if block is None and pc not in self._decoded and 0 <= pc < self.memory_size:
+            self._decoded[pc] = self._decode(self.memory[pc])
+        return block
+
+    def _invalidate_code(self, address: int):
+        super()._invalidate_code(address)
+        for entry in self._block_owners.pop(address, ()):
+            self._blocks.pop(entry, None)
+
+    def _clear_code_caches(self):
+        super()._clear_code_caches()
+        self._blocks.clear()
+        self._block_owners.clear()
 
     
     def step(self): #Ciclo completo de instrução ( IF,ID,EX,WB)
         
         # 1. ESTÁGIO IF (Instruction Fetch) - Busca
+        # A decodificação fica em cache por endereço; só busca e decodifica na primeira vez
         current_pc = self.state.pc
-        instrucao = self.fetch_instruction() 
+        decoded = self._decoded.get(current_pc)
+        if decoded is None:
+            self.decode_misses += 1
+            decoded = self._decode(self.fetch_instruction())
+            self._decoded[current_pc] = decoded
+        else:
+            self.decode_hits += 1
+
+        instrucao, handler, ra_idx, rb_idx, rc_idx, const16, addr24 = decoded
+        self.state.ir = instrucao
         self.incr_pc() 
 
         # 2. ESTÁGIO ID (Instruction Decode) - Decodificação
 
         # Tratamento antecipado do HALT (evita ler reg 255 inválido)
-        if instrucao == 0xFFFFFFFF:
+        if handler is None:
             self.state.halted = True
-            print(f"PC({current_pc}): HALT encontrado.")
+            self.events.emit(EV_HALT, current_pc, f"PC({current_pc}): HALT encontrado.")
             return
 
-        # Extração dos campos
-        opcode = self.extract_field(instrucao, 24, 31)
-        ra_idx = self.extract_field(instrucao, 16, 23)
-        rb_idx = self.extract_field(instrucao, 8, 15)
-        rc_idx = self.extract_field(instrucao, 0, 7)
-        
-        const16 = self.extract_field(instrucao, 8, 23)
-        addr24  = self.extract_field(instrucao, 0, 23)
-        
-        if 0 <= ra_idx < 32:
-            val_ra = self.read_reg(ra_idx)
-        else:
-            val_ra = 0
-
-        if 0 <= rb_idx < 32:
-            val_rb = self.read_reg(rb_idx)
-        else:
-            val_rb = 0
+        # Leitura dos operandos (R0 e índices fora do banco valem 0)
+        regs = self.state.regs
+        val_ra = regs[ra_idx] if 0 < ra_idx < 32 else 0
+        val_rb = regs[rb_idx] if 0 < rb_idx < 32 else 0
         
         # 3. ESTÁGIO EX/MEM (Execução) e 4. WB (Write Back)
         
         # Debug 
-        #nome_instrucao = self.OPCODE_NAMES.get(opcode, "DESCONHECIDO")
+        #nome_instrucao = self.OPCODE_NAMES.get(instrucao >> 24, "DESCONHECIDO")
         #print(f"[DEBUG P3] Ciclo em PC={current_pc}: Inst={nome_instrucao}")
 
-        self.execute_instruction(opcode, ra_idx, rb_idx, rc_idx, 
-                                 val_ra, val_rb, const16, addr24, current_pc)
+        handler(ra_idx, rb_idx, rc_idx, val_ra, val_rb, const16, addr24, current_pc)
+
+    def _decode(self, instrucao):
+        """
+        Separa os campos da instrução uma única vez e associa o tratador do opcode.
+        Retorna (instrucao, tratador, ra, rb, rc, const16, addr24); o tratador é None para o HALT.
+        """
+        if instrucao == 0xFFFFFFFF:
+            return (instrucao, None, 0, 0, 0, 0, 0)
+        return (instrucao,
+                self._dispatch[(instrucao >> 24) & 0xFF],
+                (instrucao >> 16) & 0xFF,   # ra  (23-16)
+                (instrucao >> 8) & 0xFF,    # rb  (15-8)
+                instrucao & 0xFF,           # rc  (7-0)
+                (instrucao >> 8) & 0xFFFF,  # const16 (23-8)
+                instrucao & 0xFFFFFF)       # addr24  (23-0)
         
     def _update_flags_alu(self, result, overflow=False, carry=False):
-        self.state.flags.zero = 1 if (result & WORD_MASK) == 0 else 0
-        self.state.flags.neg = 1 if (result & (1 << 31)) else 0
-        self.state.flags.overflow = 1 if overflow else 0
-        self.state.flags.carry = 1 if carry else 0
+        # Flags preguiçosos: só registra a operação; CPUState.flags calcula ao ser lido
+        self.state.alu_pending = (result, ALU_EXPLICIT, overflow, carry)
+
+    def _build_dispatch_table(self):
+        """
+        Monta a tabela de despacho (256 entradas, uma por opcode possível).
+        Opcodes sem instrução associada apontam para o tratador de opcode desconhecido.
+        """
+        table = [partial(self._op_unknown, opcode) for opcode in range(256)]
+        handlers = {
+            1: self._op_add, 2: self._op_sub, 3: self._op_zeros, 4: self._op_xor,
+            5: self._op_or, 6: self._op_not, 7: self._op_and, 8: self._op_asl,
+            9: self._op_asr, 10: self._op_lsl, 11: self._op_lsr, 12: self._op_copy,
+            14: self._op_lclh, 15: self._op_lcll, 16: self._op_load, 17: self._op_store,
+            18: self._op_jal, 19: self._op_jr, 20: self._op_beq, 21: self._op_bne,
+            22: self._op_j,
+            32: self._op_mul, 33: self._op_div, 34: self._op_mod, 35: self._op_inc,
+            36: self._op_dec, 37: self._op_movi, 38: self._op_notbit, 39: self._op_nop,
+        }
+        for opcode, handler in handlers.items():
+            table[opcode] = handler
+        return table
 
     def execute_instruction(self, opcode, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc):
+        # Despacho direto pela tabela (um acesso indexado, sem cadeia de comparações)
+        self._dispatch[opcode](ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc)
+
+    # ---------- tratadores das instruções ----------
+    # Todos recebem os mesmos operandos decodificados: (ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc)
+
+    # Instruções ALU
+    def _op_add(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # ADD
+        # Mesmos 32 bits (e mesmos neg/zero) da soma com sinal
+        res = val_ra + val_rb
+
+        self.write_reg(rc, res)
+        # Overflow e carry são calculados a partir dos operandos quando os flags forem lidos
+        self.state.alu_pending = (res, ALU_ADD, val_ra, val_rb)
+
+    def _op_sub(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # SUB
+        res = val_ra - val_rb
+
+        self.write_reg(rc, res)
+        self.state.alu_pending = (res, ALU_SUB, val_ra, val_rb)
+
+    def _op_zeros(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # ZEROS
+        self.write_reg(rc, 0)
+        self.state.alu_pending = (0, ALU_LOGIC, 0, 0)
+
+    def _op_xor(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # XOR
+        res = val_ra ^ val_rb
+        self.write_reg(rc, res)
+        self.state.alu_pending = (res, ALU_LOGIC, 0, 0)
+
+    def _op_or(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # OR
+        res = val_ra | val_rb
+        self.write_reg(rc, res)
+        self.state.alu_pending = (res, ALU_LOGIC, 0, 0)
+
+    def _op_not(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # NOT
+        res = ~val_ra
+        self.write_reg(rc, res)
+        self.state.alu_pending = (res, ALU_LOGIC, 0, 0)
+
+    def _op_and(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # AND
+        res = val_ra & val_rb
+        self.write_reg(rc, res)
+        self.state.alu_pending = (res, ALU_LOGIC, 0, 0)
+
+    def _op_asl(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # ASL
+        res = val_ra << (val_rb & 0x1F)
+        self.write_reg(rc, res)
+        self.state.alu_pending = (res, ALU_LOGIC, 0, 0)
+
+    def _op_asr(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # ASR
+        res = self.uint32_to_signed(val_ra) >> (val_rb & 0x1F)
+        self.write_reg(rc, res)
+        self.state.alu_pending = (res, ALU_LOGIC, 0, 0)
+
+    def _op_lsl(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # LSL
+        res = val_ra << (val_rb & 0x1F)
+        self.write_reg(rc, res)
+        self.state.alu_pending = (res, ALU_LOGIC, 0, 0)
+
+    def _op_lsr(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # LSR
+        res = val_ra >> (val_rb & 0x1F)
+        self.write_reg(rc, res)
+        self.state.alu_pending = (res, ALU_LOGIC, 0, 0)
+
+    def _op_copy(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # COPY
+        self.write_reg(rc, val_ra)
+        self.state.alu_pending = (val_ra, ALU_LOGIC, 0, 0)
+
+    # Instruções de Memória e Constantes
+    def _op_lclh(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # LCLH
+        current_rc = self.read_reg(rc)
+        lower_part = current_rc & 0x0000FFFF
+        res = (const16 << 16) | lower_part
+        self.write_reg(rc, res)
+
+    def _op_lcll(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # LCLL
+        current_rc = self.read_reg(rc)
+        upper_part = current_rc & 0xFFFF0000
+        res = upper_part | const16
+        self.write_reg(rc, res)
+
+    def _op_load(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # LOAD
+        addr = val_ra
+        try:
+            val_mem = self.read_mem(addr)
+            self.write_reg(rc, val_mem)
+        except IndexError:
+            self.events.emit(EV_ERROR, current_pc, f"Erro: Tentativa de leitura em endereço inválido {addr}")
+            self.state.halted = True
 
-        # debug pra if e id
-        #nome_instrucao = self.OPCODE_NAMES.get(opcode, "DESCONHECIDO")
-        #print(f"[DEBUG P3] Ciclo em PC={current_pc}:")
-        #print(f"   -> Instrução: {nome_instrucao} (Opcode {opcode})")
-        #print(f"   -> Registradores decodificados: Ra=R{ra}, Rb=R{rb}, Rc=R{rc}")
-        #print(f"   -> Valores lidos: Val_Ra={val_ra}, Val_Rb={val_rb}")
-        #print("-" * 40)
-        # ------------------------------------
-        
-        # Converter valores para inteiros com sinal (Necessário para contas matemáticas)
-        signed_ra = self.uint32_to_signed(val_ra)
-        signed_rb = self.uint32_to_signed(val_rb)
-
-        # Instruções ALU
-        if opcode == 1: # ADD
-            res_signed = signed_ra + signed_rb
-            # Overflow
-            overflow = (signed_ra > 0 and signed_rb > 0 and res_signed < 0) or \
-                       (signed_ra < 0 and signed_rb < 0 and res_signed > 0)
-            # Carry
-            carry = (val_ra + val_rb) > 0xFFFFFFFF
-            
-            self.write_reg(rc, res_signed)
-            self._update_flags_alu(res_signed, overflow, carry)
-            
-        elif opcode == 2: # SUB
-            res_signed = signed_ra - signed_rb
-            # Overflow na subtração
-            overflow = (signed_ra > 0 and signed_rb < 0 and res_signed < 0) or \
-                       (signed_ra < 0 and signed_rb > 0 and res_signed > 0)
-            carry = val_ra < val_rb
-            
-            self.write_reg(rc, res_signed)
-            self._update_flags_alu(res_signed, overflow, carry)
-
-        elif opcode == 3: # ZEROS
-            self.write_reg(rc, 0)
-            self._update_flags_alu(0)
-
-        elif opcode == 4: # XOR
-            res = val_ra ^ val_rb
-            self.write_reg(rc, res)
-            self._update_flags_alu(res)
-
-        elif opcode == 5: # OR
-            res = val_ra | val_rb
-            self.write_reg(rc, res)
-            self._update_flags_alu(res)
-
-        elif opcode == 6: # NOT
-            res = ~val_ra
-            self.write_reg(rc, res)
-            self._update_flags_alu(res)
-
-        elif opcode == 7: # AND
-            res = val_ra & val_rb
-            self.write_reg(rc, res)
-            self._update_flags_alu(res)
+    def _op_store(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # STORE
+        addr = self.read_reg(rc) # Endereço está em RC
+        val_to_store = val_ra    # Valor está em RA
+        try:
+            self.write_mem(addr, val_to_store)
+        except IndexError:
+            self.events.emit(EV_ERROR, current_pc, f"Erro: Tentativa de escrita em endereço inválido {addr}")
+            self.state.halted = True
 
-        elif opcode == 8: # ASL
-            res = val_ra << (val_rb & 0x1F)
-            self.write_reg(rc, res)
-            self._update_flags_alu(res)
+    # Instruções de Controle de Fluxo (jumps e branches)
+    def _op_jal(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # JAL
+        self.write_reg(31, self.state.pc)
+        self.set_pc(addr24)
 
-        elif opcode == 9: # ASR
-            res = signed_ra >> (val_rb & 0x1F)
-            self.write_reg(rc, res)
-            self._update_flags_alu(res)
+    def _op_jr(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # JR
+        target = self.read_reg(rc)
+        self.set_pc(target)
 
-        elif opcode == 10: # LSL
-            res = val_ra << (val_rb & 0x1F)
-            self.write_reg(rc, res)
-            self._update_flags_alu(res)
+    def _op_beq(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # BEQ
+        if val_ra == val_rb:
+            self.set_pc(rc)
 
-        elif opcode == 11: # LSR
-            res = val_ra >> (val_rb & 0x1F)
-            self.write_reg(rc, res)
-            self._update_flags_alu(res)
+    def _op_bne(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # BNE
+        if val_ra != val_rb:
+            self.set_pc(rc)
 
-        elif opcode == 12: # COPY
-            self.write_reg(rc, val_ra)
-            self._update_flags_alu(val_ra)
+    def _op_j(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # J
+        self.set_pc(addr24)
 
-        # Instruções de Memória e Constantes
-        elif opcode == 14: # LCLH
-            current_rc = self.read_reg(rc)
-            lower_part = current_rc & 0x0000FFFF
-            res = (const16 << 16) | lower_part
-            self.write_reg(rc, res)
+    # Instruções Extras
+    def _op_mul(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # MUL
+        res = self.uint32_to_signed(val_ra) * self.uint32_to_signed(val_rb)
+        self.write_reg(rc, res)
+        self.state.alu_pending = (res, ALU_LOGIC, 0, 0)
 
-        elif opcode == 15: # LCLL
-            current_rc = self.read_reg(rc)
-            upper_part = current_rc & 0xFFFF0000
-            res = upper_part | const16
-            self.write_reg(rc, res)
-            
-        elif opcode == 16: # LOAD
-            addr = val_ra
-            try:
-                val_mem = self.read_mem(addr)
-                self.write_reg(rc, val_mem)
-            except IndexError:
-                print(f"Erro: Tentativa de leitura em endereço inválido {addr}")
-                self.state.halted = True
-            
-        elif opcode == 17: # STORE
-            addr = self.read_reg(rc) # Endereço está em RC
-            val_to_store = val_ra    # Valor está em RA
-            try:
-                self.write_mem(addr, val_to_store)
-            except IndexError:
-                print(f"Erro: Tentativa de escrita em endereço inválido {addr}")
-                self.state.halted = True
-
-
-        # Instruções de Controle de Fluxo (jumps e branches)
-        elif opcode == 18: # JAL
-            self.write_reg(31, self.state.pc)
-            self.set_pc(addr24)
-
-        elif opcode == 19: # JR
-            target = self.read_reg(rc)
-            self.set_pc(target)
-
-        elif opcode == 20: # BEQ
-            if val_ra == val_rb:
-                self.set_pc(rc)
-
-        elif opcode == 21: # BNE
-            if val_ra != val_rb:
-                self.set_pc(rc)
-            
-        elif opcode == 22: # J
-            self.set_pc(addr24)
-
-        # Instruções Extras
-        elif opcode == 32: # MUL
-            res = signed_ra * signed_rb
+    def _op_div(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # DIV
+        signed_ra = self.uint32_to_signed(val_ra)
+        signed_rb = self.uint32_to_signed(val_rb)
+        if signed_rb != 0:
+            res = int(signed_ra / signed_rb)
             self.write_reg(rc, res)
-            self._update_flags_alu(res)
-
-        elif opcode == 33: # DIV
-            if signed_rb != 0:
-                res = int(signed_ra / signed_rb)
-                self.write_reg(rc, res)
-                self._update_flags_alu(res)
-            else:
-                print(f"Erro: Divisão por zero em PC={current_pc}")
-                self.state.halted = True
+            self.state.alu_pending = (res, ALU_LOGIC, 0, 0)
+        else:
+            self.events.emit(EV_ERROR, current_pc, f"Erro: Divisão por zero em PC={current_pc}")
+            self.state.halted = True
 
-        elif opcode == 34: # MOD
-            if signed_rb != 0:
-                self.write_reg(rc, signed_ra % signed_rb)
-            else:
-                 print(f"Erro: Divisão por zero (MOD) em PC={current_pc}")
-                 self.state.halted = True
+    def _op_mod(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # MOD
+        signed_ra = self.uint32_to_signed(val_ra)
+        signed_rb = self.uint32_to_signed(val_rb)
+        if signed_rb != 0:
+            self.write_reg(rc, signed_ra % signed_rb)
+        else:
+            self.events.emit(EV_ERROR, current_pc, f"Erro: Divisão por zero (MOD) em PC={current_pc}")
+            self.state.halted = True
 
-        elif opcode == 35: # INC
-            res = signed_ra + 1
-            self.write_reg(rc, res)
-            self._update_flags_alu(res)
+    def _op_inc(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # INC
+        res = self.uint32_to_signed(val_ra) + 1
+        self.write_reg(rc, res)
+        self.state.alu_pending = (res, ALU_LOGIC, 0, 0)
 
-        elif opcode == 36: # DEC
-            res = signed_ra - 1
-            self.write_reg(rc, res)
-            self._update_flags_alu(res)
+    def _op_dec(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # DEC
+        res = self.uint32_to_signed(val_ra) - 1
+        self.write_reg(rc, res)
+        self.state.alu_pending = (res, ALU_LOGIC, 0, 0)
 
-        elif opcode == 37: # MOVI
-            self.write_reg(rc, const16)
+    def _op_movi(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # MOVI
+        self.write_reg(rc, const16)
 
-        elif opcode == 38: # NOTBIT
-            self.write_reg(rc, ~(val_ra & val_rb))
+    def _op_notbit(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # NOTBIT
+        self.write_reg(rc, ~(val_ra & val_rb))
 
-        elif opcode == 39: # NOP
-            pass
+    def _op_nop(self, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc): # NOP
+        pass
 
-        else:
-            # Opcode desconhecido
-            print(f"AVISO: Opcode {opcode} desconhecido em PC={current_pc}")
+    def _op_unknown(self, opcode, ra, rb, rc, val_ra, val_rb, const16, addr24, current_pc):
+        # Opcode desconhecido (o opcode vem pré-associado pela tabela de despacho)
+        self.events.emit(EV_WARNING, current_pc, f"AVISO: Opcode {opcode} desconhecido em PC={current_pc}")
 
 # -----------------------------------------------------------------------------
 # Bloco de Teste Rápido (Só roda se executar este arquivo diretamente)
@@ -1,67 +1,136 @@
 """
 CPU com Sistema de Logging Integrado
  - Versão da CPU que registra todas as mudanças de estado
+ - Com trace_size=K, funciona como caixa-preta: guarda só os últimos K ciclos, que podem
+   ser gravados depois de um erro ou do fim do orçamento
+ - Com trace_path, grava o trace binário compacto da execução (ver tracefile.py)
+ - Com log_path, escreve o log em texto durante a execução (em fluxo, opcionalmente
+   comprimido), com memória constante
 """
 
-from cpu import CPU
+from typing import Optional
+from cpu import CPU, RunResult
+from events import EventSink, EV_INFO
+from loader import ADDRESS_BITS, REG_COUNT
 from logger import StateLogger
+from tracefile import TraceWriter
 
 class CPULogged(CPU):
     """
     Extensão da CPU que integra o sistema de logging.
     Registra automaticamente todas as mudanças de estado a cada ciclo.
     """
+
+    RUN_START_MESSAGE = "--- Iniciando Execução com Logging (PC Inicial: {pc}) ---"
     
-    def __init__(self, enable_logging: bool = True, verbose: bool = False):
+    def __init__(self, enable_logging: bool = True, verbose: bool = False,
+                 memory_backend: str = "list", address_bits: int = ADDRESS_BITS,
+                 events: Optional[EventSink] = None, symbols=None,
+                 trace_size: Optional[int] = None, trace_path: Optional[str] = None,
+                 log_path: Optional[str] = None):
         """
         Inicializa a CPU com logging.
         
         Args:
             enable_logging: Se True, ativa o logging de mudanças de estado
             verbose: Se True, imprime logs no console durante a execução
+            memory_backend: Representação da memória principal ("list", "array" ou "paged")
+            address_bits: Largura do endereço de palavra (2**address_bits palavras de memória)
+            events: Destino dos eventos de execução (padrão: ConsoleSink)
+            symbols: Mapa de símbolos do programa (interpretador.MapaSimbolos), para
+                     mostrar os PCs do log também pelo rótulo
+            trace_size: Guarda só os últimos K ciclos (buffer circular); None guarda todos
+            trace_path: Arquivo do trace binário, gravado durante cada run() (None = sem trace)
+            log_path: Arquivo do log em texto, escrito ciclo a ciclo durante cada run() em vez de
+                      guardado em memória (.gz = gzip, .xz = lzma). Requer enable_logging
         """
-        super().__init__()
+        if log_path and not enable_logging:
+            raise ValueError("log_path requer enable_logging=True")
+        super().__init__(memory_backend, address_bits, events)
+        self.log_path = log_path
         self.enable_logging = enable_logging
         self.verbose = verbose
         
         if self.enable_logging:
-            self.logger = StateLogger(self)
+            self.logger = StateLogger(self, trace_size)
+            self.logger.symbols = symbols
         else:
             self.logger = None
+        self.tracer = TraceWriter(self, trace_path) if trace_path else None
+        # Quem recebe os ganchos de escrita (logger e/ou trace binário). Só fica em _watchers
+        # durante run(): escritas de step() avulsos ou de fora da execução não são acumuladas
+        self._run_watchers = tuple(w for w in (self.logger, self.tracer) if w is not None)
+        self._watchers = ()
     
-    def run(self):
-        """Loop principal com logging integrado."""
-        if self.enable_logging:
-            self.logger.capture_initial_state()
-        
-        print(f"--- Iniciando Execução com Logging (PC Inicial: {self.state.pc}) ---")
-        
-        cycle_count = 0
-        
-        while not self.state.halted:
-            self.step()
-            cycle_count += 1
-            
-            # Registra o log após cada ciclo completo
+    def write_reg(self, reg_index: int, value: int):
+        """Escreve no registrador avisando o logger (gancho de escrita) antes da escrita."""
+        if self._watchers and 0 < reg_index < REG_COUNT:
+            before = self.state.regs[reg_index]
+            for watcher in self._watchers:
+                watcher.reg_written(reg_index, before)
+        super().write_reg(reg_index, value)
+
+    def write_mem(self, address: int, value: int):
+        """Escreve na memória e põe o endereço na lista de escritas do ciclo (dirty list)."""
+        super().write_mem(address, value)
+        for watcher in self._watchers:
+            watcher.dirty_addresses.append(address)
+
+    def step(self):
+        """Executa uma instrução e, durante run(), registra o ciclo no logger e no trace."""
+        super().step()
+        if self._watchers:
             if self.enable_logging:
                 log_data = self.logger.log_cycle("COMPLETE")
                 if self.verbose:
                     self.logger.print_cycle_log(log_data)
-            
-            # Limite de segurança
-            if cycle_count > 5000:
-                print("AVISO: Limite de ciclos de segurança atingido (Loop infinito?)")
-                break
-        
-        print(f"--- Execução Finalizada em {cycle_count} ciclos ---")
+            if self.tracer is not None:
+                self.tracer.log_cycle()
+
+    def run(self, engine: str = "interp", max_cycles: Optional[int] = None,
+            deadline: Optional[float] = None) -> RunResult:
+        """
+        Loop principal com logging integrado. O orçamento, o tempo limite e os breakpoints
+        são os de CPU.run; cada ciclo é registrado pelo step().
+
+        Args:
+            engine: Só "interp": o logging precisa dos ganchos de cada instrução
+            max_cycles: Orçamento de ciclos (None = sem limite)
+            deadline: Tempo máximo de execução em segundos, no relógio de parede (None = sem limite)
+
+        Returns:
+            RunResult com os ciclos executados, o motivo da parada e o PC final
+        """
+        if engine != "interp":
+            raise ValueError(f"CPULogged só executa com o motor 'interp' (recebido: '{engine}')")
+        self._cycle_limit(max_cycles)
+        if self.enable_logging:
+            self.logger.capture_initial_state()
+            if self.log_path:
+                self.logger.start_stream(self.log_path)
+        if self.tracer is not None:
+            self.tracer.capture_initial_state()
+
+        self._watchers = self._run_watchers
+        try:
+            result = super().run(engine, max_cycles, deadline)
+        finally:
+            self._watchers = ()
+            # Trace e log em fluxo ficam completos no disco ao fim da execução (HALT, orçamento ou erro)
+            if self.tracer is not None:
+                self.tracer.close()
+            if self.log_path:
+                self.logger.stop_stream()
         
         # Exibe resumo
         if self.enable_logging:
             summary = self.logger.get_summary()
-            print(f"\nResumo da Execução:")
-            print(f"  Total de Ciclos: {summary['total_cycles']}")
-            print(f"  PC Final: {summary['final_pc']}")
-            print(f"  Flags Finais: {summary['final_flags']}")
+            self.events.emit(EV_INFO, self.state.pc,
+                             f"\nResumo da Execução:\n"
+                             f"  Total de Ciclos: {summary['total_cycles']}\n"
+                             f"  PC Final: {summary['final_pc']}\n"
+                             f"  Flags Finais: {summary['final_flags']}")
+        return result
     
     def save_execution_log(self, filepath: str):
         """Salva o log completo da execução em um arquivo."""
@@ -0,0 +1,89 @@
+"""
+Eventos de Execução do Simulador UFLA-RISC
+ - A CPU não imprime nada diretamente: início/fim da execução, HALT, erros e avisos
+   viram eventos entregues a um destino (sink) plugável
+ - ConsoleSink reproduz a saída de console original; os demais não fazem I/O
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+# Tipos de evento
+EV_RUN_START = "run_start"      # início do run()
+EV_RUN_END = "run_end"          # fim do run()
+EV_HALT = "halt"                # instrução HALT executada
+EV_ERROR = "error"              # erro de execução (acesso inválido, divisão por zero, PC fora da memória)
+EV_WARNING = "warning"          # aviso (opcode desconhecido, orçamento de ciclos ou tempo esgotado)
+EV_BREAKPOINT = "breakpoint"    # PC chegou a um breakpoint
+EV_INFO = "info"                # informações extras (resumo da CPULogged)
+
+
+@dataclass
+class Event:
+    """Um evento de execução: tipo (EV_*), PC relacionado (se houver) e o texto para o console."""
+    kind: str
+    pc: Optional[int]
+    message: str
+
+
+class EventSink(ABC):
+    """
+    Destino de eventos. emit() é o ponto de entrada usado pela CPU: monta o Event e o
+    entrega a handle(), que cada subclasse implementa.
+    """
+
+    def emit(self, kind: str, pc: Optional[int], message: str):
+        self.handle(Event(kind, pc, message))
+
+    @abstractmethod
+    def handle(self, event: Event):
+        """Trata um evento."""
+
+
+class ConsoleSink(EventSink):
+    """Imprime cada evento no console, exatamente como a CPU fazia antes (padrão)."""
+
+    def handle(self, event: Event):
+        print(event.message)
+
+
+class ListSink(EventSink):
+    """Guarda os eventos em uma lista (self.events)."""
+
+    def __init__(self):
+        self.events: List[Event] = []
+
+    def handle(self, event: Event):
+        self.events.append(event)
+
+    def messages(self) -> List[str]:
+        """Textos dos eventos, na ordem em que aconteceram."""
+        return [event.message for event in self.events]
+
+
+class CallbackSink(EventSink):
+    """Repassa cada evento para uma função."""
+
+    def __init__(self, callback: Callable[[Event], None]):
+        self.callback = callback
+
+    def handle(self, event: Event):
+        self.callback(event)
+
+
+class CounterSink(EventSink):
+    """Só conta os eventos por tipo (self.counts), sem guardá-los."""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+
+    def handle(self, event: Event):
+        self.counts[event.kind] = self.counts.get(event.kind, 0) + 1
+
+
+class NullSink(EventSink):
+    """Descarta todos os eventos (execução silenciosa)."""
+
+    def handle(self, event: Event):
+        pass
@@ -1,4 +1,15 @@
+import argparse
+import hashlib
+import json
+import os
 import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from loader import read_image, write_image
 
 # DICIONÁRIO DE INSTRUÇÕES (OPCODES)
 OPCODES = {
@@ -36,117 +47,683 @@ OPCODES = {
     "nop":      {"code": "00100111", "tipo": "NOP"},   # No Operation (Não faz nada)
 }
 
+# Tabela do montador: mnemônico -> (opcode já deslocado para os bits 31-24, tipo)
+CODIGOS = {cmd: (int(info["code"], 2) << 24, info["tipo"]) for cmd, info in OPCODES.items()}
+
+# Nomes de registradores já convertidos (evita o parse de cada operando)
+_REG_NUMEROS = {f"{prefixo}{i}": i for prefixo in "rR" for i in range(256)}
+
 # FUNÇÕES AUXILIARES DE CONVERSÃO
-def reg_to_bin(reg):
-    """ 
-    Converte o nome de um registrador (ex: 'r3', 'R10') para seu código binario de 8 bits.
-    Exemplo: 'r3' -> '00000011'
+def reg_to_int(reg):
+    """
+    Converte o nome de um registrador (ex: 'r3', 'R10') para o número do campo de 8 bits.
+    Exemplo: 'r3' -> 3
     """
+    num = _REG_NUMEROS.get(reg)
+    if num is not None:
+        return num
     try:
-        # Remove o 'r' e caracteres extras, depois converte para inteiro e formata
-        num = int(reg.lower().replace("r", "").replace(",", ""))
-        return f"{num:08b}"
-    except:
-        return "00000000" # Retorna 0 se falhar (segurança)
+        # Remove o 'r' e caracteres extras, depois converte para inteiro
+        return int(reg.lower().replace("r", "").replace(",", "")) & 0xFF
+    except ValueError:
+        return 0 # Retorna 0 se falhar (segurança)
 
-def num_to_bin(num, bits):
-    """ 
-    Converte um nuero (string) para binário com N bits.
+def num_to_int(num, bits):
+    """
+    Converte um numero (string) para um campo de N bits (os bits excedentes são descartados).
      Binario explicito começa com '0b' (ex: '0b101' -> 5)
      Decimal padrao apenas numeros (ex: '10' -> 10)
     """
     num = num.replace(",", "")
-    
-    # Se o usuário digitou binário (ex: 0b101)
-    if num.startswith("0b"):
-        bin_value = num[2:] # Remove o '0b'
-        return bin_value.zfill(bits)[-bits:] # Preenche com zeros a esquerda
-    
-    # Se o usuário digitou decimal
+    mascara = (1 << bits) - 1
     try:
-        return f"{int(num):0{bits}b}"[-bits:]
-    except:
-        return "0" * bits # Retorna zeros se não for valido
+        # Se o usuário digitou binário (ex: 0b101)
+        if num.startswith("0b"):
+            return int(num[2:] or "0", 2) & mascara
+        # Se o usuário digitou decimal
+        return int(num) & mascara
+    except ValueError:
+        return 0 # Retorna zero se não for valido
+
+def reg_to_bin(reg):
+    """Converte o nome de um registrador para seu código binário de 8 bits ('r3' -> '00000011')."""
+    return f"{reg_to_int(reg):08b}"
+
+def num_to_bin(num, bits):
+    """Converte um numero (string) para binário com N bits."""
+    return f"{num_to_int(num, bits):0{bits}b}"
 
 # NÚCLEO DO MONTADOR (ASSEMBLER)
-def montar_instrucao(linha):
+def separar_linha(linha):
     """
-    Analisa uma linha de texto Assembly e converte para a instrução de maquina (32 bits)
-    Identifica o tipo da instrução (R_R_R, CONST, J, etc) e organiza os bits na ordem correta
+    Lexer simples: separa a linha em partes (mnemônico e operandos).
+    Retorna None para linhas vazias ou comentarios # ou //
     """
-    # Limpeza e separação da linha Lexer simples
-    partes = linha.strip().replace(",", " ").split()
-
-    # Ignora linhas vazias ou comentarios # ou //
-    if not partes or linha.strip().startswith(("#", "//")):
+    linha = linha.strip()
+    if not linha or linha.startswith(("#", "//")):
         return None
+    return linha.replace(",", " ").split() or None
 
-    cmd = partes[0].lower()
-
-    # Tratamento da diretiva ADDRESS posicao de memoria
-    if cmd == "address":
-        return f"address {num_to_bin(partes[1], 16)}"
-
-    if cmd not in OPCODES:
+def montar_partes(partes, valor=num_to_int):
+    """
+    Converte uma instrução já separada em partes para a palavra de maquina (inteiro de 32 bits).
+    Identifica o tipo da instrução (R_R_R, CONST, J, etc) e posiciona cada campo com
+    deslocamentos e mascaras. Retorna None para mnemônicos desconhecidos.
+    `valor(token, bits)` converte os campos numéricos (o montador de dois passos resolve símbolos nele).
+    """
+    codigo = CODIGOS.get(partes[0].lower())
+    if codigo is None:
         return None
 
     #Recupera os dados da instrucao
-    op = OPCODES[cmd]["code"]
-    tipo = OPCODES[cmd]["tipo"]
-    args = partes[1:] 
-
-    # Montagem dos bits baseada no TIPO da instrução Parser CodeGen
-    
-    # Tipo NOP: Instrução vazia enche de zeros
-    if tipo == "NOP":
-        return op + "0" * 24
+    op, tipo = codigo
+    args = partes[1:]
 
     # Tipo R_R_R: Instruções Aritméticas (add, sub...)
     # Ordem Binaria: OPCODE | RA | RB | RC
     # Ordem Escrita: add rc, ra, rb
     if tipo == "R_R_R":
-        return op + reg_to_bin(args[1]) + reg_to_bin(args[2]) + reg_to_bin(args[0])
+        return op | reg_to_int(args[1]) << 16 | reg_to_int(args[2]) << 8 | reg_to_int(args[0])
 
     if tipo == "R_R":
-        return op + reg_to_bin(args[1]) + "00000000" + reg_to_bin(args[0])
-
-    # Tipo R: Instruções de 1 Operando zeros, jr
-    if tipo == "R":
-        return op + "00000000" + "00000000" + reg_to_bin(args[0])
+        return op | reg_to_int(args[1]) << 16 | reg_to_int(args[0])
 
     # Tipo CONST: Carregamento de valor imediato lcl
     if tipo == "CONST":
-        return op + num_to_bin(args[1], 16) + reg_to_bin(args[0])
+        return op | valor(args[1], 16) << 8 | reg_to_int(args[0])
 
     # Tipo BRANCH: Desvios Condicionais beq, bne
     if tipo == "BRANCH":
-        return op + reg_to_bin(args[0]) + reg_to_bin(args[1]) + num_to_bin(args[2], 8)
+        return op | reg_to_int(args[0]) << 16 | reg_to_int(args[1]) << 8 | valor(args[2], 8)
 
     # Tipo J: Desvios Incondicionais jump, jal
     if tipo == "J":
-        return op + num_to_bin(args[0], 24)
+        return op | valor(args[0], 24)
+
+    # Tipo R: Instruções de 1 Operando zeros, jr
+    if tipo == "R":
+        return op | reg_to_int(args[0])
 
     # Tipo HALT: Parada total
     if tipo == "NONE":
-        return "1" * 32
+        return 0xFFFFFFFF
 
-    return None
+    # Tipo NOP: Instrução vazia (só o opcode)
+    return op
+
+def montar_instrucao(linha):
+    """
+    Analisa uma linha de texto Assembly e converte para a instrução de maquina em texto
+    (32 caracteres '0'/'1', o formato do .bin). A diretiva ADDRESS vira 'address <16 bits>'.
+    A montagem em si é feita com inteiros (montar_partes); o texto só é gerado aqui.
+    """
+    partes = separar_linha(linha)
+    if partes is None:
+        return None
+
+    # Tratamento da diretiva ADDRESS posicao de memoria
+    if partes[0].lower() == "address":
+        return f"address {num_to_bin(partes[1], 16)}"
+
+    palavra = montar_partes(partes)
+    return None if palavra is None else f"{palavra:032b}"
+
+# MONTADOR DE DOIS PASSOS (rótulos, constantes e dados)
+# Diretivas de dados e de símbolos (além de ADDRESS)
+DIRETIVA_EQU = ".equ"       # .equ NOME, valor      -> constante
+DIRETIVA_WORD = ".word"     # .word v1, v2, ...     -> palavras de 32 bits
+DIRETIVA_SPACE = ".space"   # .space n              -> n palavras zeradas
+
+
+class ErroMontagem(ValueError):
+    """Erro no fonte assembly (símbolo indefinido ou repetido, instrução desconhecida...)."""
+
+    def __init__(self, linha, mensagem):
+        super().__init__(f"Linha {linha}: {mensagem}")
+        self.linha = linha
+
+
+class MapaSimbolos:
+    """
+    Rótulos do programa montado (nome -> endereço) e a busca inversa endereço ->
+    'rotulo' ou 'rotulo+deslocamento', usada em logs e relatórios.
+    """
+
+    def __init__(self, rotulos):
+        self.rotulos = dict(rotulos)
+        ordenados = sorted((endereco, nome) for nome, endereco in self.rotulos.items())
+        self._enderecos = [endereco for endereco, _ in ordenados]
+        self._nomes = [nome for _, nome in ordenados]
+
+    def rotulo(self, endereco):
+        """Nome do endereço pelo rótulo mais próximo antes dele (None se não houver)."""
+        i = bisect_right(self._enderecos, endereco) - 1
+        if i < 0:
+            return None
+        deslocamento = endereco - self._enderecos[i]
+        return self._nomes[i] if deslocamento == 0 else f"{self._nomes[i]}+{deslocamento}"
+
+    def salvar(self, caminho):
+        """Grava o mapa em texto: uma linha 'endereco nome' por rótulo, em ordem de endereço."""
+        with open(caminho, "w", encoding="utf-8") as f:
+            for endereco, nome in zip(self._enderecos, self._nomes):
+                f.write(f"{endereco} {nome}\n")
+
+    @classmethod
+    def carregar(cls, caminho):
+        """Lê um mapa gravado por salvar()."""
+        rotulos = {}
+        with open(caminho, "r", encoding="utf-8") as f:
+            for linha in f:
+                if linha.strip():
+                    endereco, nome = linha.split()
+                    rotulos[nome] = int(endereco)
+        return cls(rotulos)
+
+
+@dataclass
+class Programa:
+    """Resultado do montador de dois passos."""
+    segmentos: list             # [(endereco, array('I'))]
+    simbolos: MapaSimbolos      # rótulos -> endereços
+    constantes: dict            # constantes .equ -> valor
+    entrada: int                # PC de entrada (primeiro endereço montado)
+
+
+def _numero(token):
+    """Valor de um literal numérico (decimal ou 0b...), ou None se o token não é um número."""
+    try:
+        if token.startswith("0b"):
+            return int(token[2:], 2)
+        return int(token)
+    except ValueError:
+        return None
+
+
+class _Pendente(Exception):
+    """Referência a um símbolo ainda não definido (resolvida quando ele for definido)."""
+
+    def __init__(self, simbolo):
+        super().__init__(simbolo)
+        self.simbolo = simbolo
+
+
+# PIPELINE DO MONTADOR: linhas -> tokenizar -> Montador.blocos -> escrever_blocos
+def tokenizar(linhas):
+    """
+    Etapa de tokenização: produz (número da linha, partes) de cada linha com conteúdo,
+    já sem comentários (da linha inteira ou no fim dela).
+    """
+    for numero, linha in enumerate(linhas, 1):
+        partes = separar_linha(linha)
+        if partes is None:
+            continue
+        # Comentário no fim da linha
+        if "#" in linha or "//" in linha:
+            for i, parte in enumerate(partes):
+                if parte.startswith(("#", "//")):
+                    partes = partes[:i]
+                    break
+            if not partes:
+                continue
+        yield numero, partes
+
+
+class Montador:
+    """
+    Etapa de codificação: montador de dois passos em fluxo, linear no tamanho do fonte.
+    Define os símbolos (rótulos 'nome:' e constantes .equ) à medida que aparecem e já monta
+    as palavras cujos operandos são conhecidos; as que citam símbolos definidos mais
+    adiante ficam pendentes e o 2º passo as completa assim que o símbolo é definido.
+    Operandos numéricos (constantes, alvos de desvio, ADDRESS, .word) aceitam símbolos.
+
+    Os blocos montados só são liberados quando não há pendências, então a memória usada
+    fica limitada à tabela de símbolos e ao trecho entre uma referência adiante e a
+    definição do símbolo (fontes sem referências adiante passam em blocos de LOTE palavras).
+    """
+
+    LOTE = 4096     # palavras por bloco liberado
+
+    def __init__(self):
+        self.rotulos = {}       # rótulo -> endereço
+        self.constantes = {}    # constante .equ -> valor
+        self.simbolos = {}      # rótulos e constantes juntos (consultados na resolução)
+        self.linhas = 0         # linhas lidas do fonte (até a última com conteúdo)
+
+    def blocos(self, itens):
+        """
+        Gerador: recebe (linha, partes) de tokenizar() e produz (endereco, array('I'), novo),
+        onde `novo` indica que o bloco começa um segmento (ADDRESS) e não continua o anterior.
+        Erros no fonte levantam ErroMontagem.
+        """
+        rotulos = self.rotulos
+        simbolos = self.simbolos
+        espera = {}         # símbolo -> pendências (linha, bloco, índice, partes) que dependem dele
+        pendentes = 0
+        prontos = []        # blocos montados ainda não liberados
+        numero = 0
+
+        def valor(token, bits):
+            v = simbolos.get(token)
+            if v is None:
+                v = _numero(token)
+                if v is None:
+                    # Ainda pode ser definido mais adiante (o fim do fonte acusa se não for)
+                    raise _Pendente(token)
+            elif v >> bits:
+                # Literais são truncados no tamanho do campo (como em num_to_int); símbolos não
+                raise ErroMontagem(numero, f"'{token}' = {v} não cabe em {bits} bits")
+            return v & ((1 << bits) - 1)
+
+        def imediato(token, bits):
+            """Valor que precisa ser conhecido na hora (ADDRESS, .equ, .space)."""
+            try:
+                return valor(token, bits)
+            except _Pendente:
+                raise ErroMontagem(numero, f"símbolo '{token}' usado antes de ser definido") from None
+
+        def resolver(pendencia):
+            """2º passo de uma palavra pendente (volta a esperar se faltar outro símbolo)."""
+            nonlocal numero, pendentes
+            atual_numero = numero
+            numero, bloco, indice, partes = pendencia
+            try:
+                if partes[0] == DIRETIVA_WORD:
+                    bloco[indice] = valor(partes[1], 32)
+                else:
+                    bloco[indice] = montar_partes(partes, valor)
+            except _Pendente as p:
+                espera.setdefault(p.simbolo, []).append(pendencia)
+                pendentes += 1
+            finally:
+                numero = atual_numero
+
+        def definir(nome, v):
+            nonlocal pendentes
+            if not nome.isidentifier() or nome.lower() in CODIGOS or nome in _REG_NUMEROS:
+                raise ErroMontagem(numero, f"nome de símbolo inválido '{nome}'")
+            if nome in simbolos:
+                raise ErroMontagem(numero, f"símbolo '{nome}' definido mais de uma vez")
+            simbolos[nome] = v
+            aguardando = espera.pop(nome, None)
+            if aguardando:
+                pendentes -= len(aguardando)
+                for pendencia in aguardando:
+                    resolver(pendencia)
+
+        endereco = 0
+        atual = None        # bloco em montagem (array('I'))
+        novo = True         # o próximo bloco começa um segmento
+        for numero, partes in itens:
+            while partes[0].endswith(":"):
+                definir(partes[0][:-1], endereco)
+                rotulos[partes[0][:-1]] = endereco
+                partes = partes[1:]
+                if not partes:
+                    break
+            if not partes:
+                continue
+            cmd = partes[0].lower()
+            try:
+                if cmd in CODIGOS:
+                    if atual is None:
+                        atual = array('I')
+                        prontos.append((endereco, atual, novo))
+                    try:
+                        atual.append(montar_partes(partes, valor))
+                    except _Pendente as p:
+                        espera.setdefault(p.simbolo, []).append((numero, atual, len(atual), partes))
+                        pendentes += 1
+                        atual.append(0)
+                    endereco += 1
+                    if len(atual) >= self.LOTE and not pendentes:
+                        yield from prontos
+                        prontos.clear()
+                        atual = None
+                        novo = False
+                elif cmd == "address":
+                    endereco = imediato(partes[1], 16)
+                    atual = None
+                    novo = True
+                    if not pendentes and prontos:
+                        yield from prontos
+                        prontos.clear()
+                elif cmd == DIRETIVA_EQU:
+                    definir(partes[1], imediato(partes[2], 32))
+                    self.constantes[partes[1]] = simbolos[partes[1]]
+                elif cmd in (DIRETIVA_WORD, DIRETIVA_SPACE):
+                    tamanho = len(partes) - 1 if cmd == DIRETIVA_WORD else imediato(partes[1], 32)
+                    if tamanho == 0:
+                        continue
+                    if atual is None:
+                        atual = array('I')
+                        prontos.append((endereco, atual, novo))
+                    if cmd == DIRETIVA_SPACE:
+                        atual.frombytes(bytes(4 * tamanho))
+                    else:
+                        for token in partes[1:]:
+                            try:
+                                atual.append(valor(token, 32))
+                            except _Pendente as p:
+                                espera.setdefault(p.simbolo, []).append(
+                                    (numero, atual, len(atual), [DIRETIVA_WORD, token]))
+                                pendentes += 1
+                                atual.append(0)
+                    endereco += tamanho
+                else:
+                    raise ErroMontagem(numero, f"instrução desconhecida '{partes[0]}'")
+            except IndexError:
+                raise ErroMontagem(numero, f"operandos faltando em '{' '.join(partes)}'") from None
+        self.linhas = numero
+
+        # Fim do fonte: o que ainda espera por um símbolo nunca será resolvido
+        if espera:
+            numero, simbolo = min((pendencia[0], nome) for nome, lista in espera.items()
+                                  for pendencia in lista)
+            raise ErroMontagem(numero, f"símbolo indefinido '{simbolo}'")
+        yield from prontos
+
+
+def montar_programa(linhas):
+    """
+    Monta o fonte inteiro em memória (pipeline tokenizar -> Montador) e retorna um Programa.
+    Erros no fonte levantam ErroMontagem.
+    """
+    montador = Montador()
+    segmentos = []
+    for endereco, palavras, novo in montador.blocos(tokenizar(linhas)):
+        if novo:
+            segmentos.append((endereco, palavras))
+        else:
+            segmentos[-1][1].extend(palavras)
+    entrada = segmentos[0][0] if segmentos else 0
+    return Programa(segmentos, MapaSimbolos(montador.rotulos), montador.constantes, entrada)
+
+
+# CACHE DE MONTAGEM
+# Versão do montador: faz parte da chave do cache (mude sempre que a codificação mudar)
+VERSAO_MONTADOR = "3"
+
+
+class CacheMontagem:
+    """
+    Cache em disco de programas montados, endereçado pelo conteúdo: a chave é o hash do
+    fonte junto com a versão do montador, então um fonte que não mudou não é montado de novo.
+    O tamanho total é limitado; ao passar do limite saem as entradas usadas há mais tempo (LRU).
+    Cada entrada é uma imagem binária (write_image, com o PC de entrada no cabeçalho) e um
+    arquivo JSON ao lado com os rótulos e as constantes.
+    """
+
+    EXTENSAO = ".img"
+    EXTENSAO_SIMBOLOS = ".json"
+
+    def __init__(self, pasta, max_bytes=64 * 1024 * 1024):
+        self.pasta = pasta
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(pasta, exist_ok=True)
+        # Índice das entradas (chave -> tamanho em bytes), da usada há mais tempo à mais recente.
+        # A ordem entre execuções vem da data de modificação, atualizada a cada acerto
+        self._entradas = OrderedDict()
+        self._total = 0
+        self._varrer()
+
+    def _varrer(self):
+        """Refaz o índice a partir da pasta (inclui entradas gravadas por outros processos)."""
+        arquivos = []
+        for nome in os.listdir(self.pasta):
+            if nome.endswith(self.EXTENSAO):
+                chave = nome[:-len(self.EXTENSAO)]
+                tamanho = self._tamanho(chave)
+                if tamanho is not None:
+                    mtime = os.stat(os.path.join(self.pasta, nome)).st_mtime
+                    arquivos.append((mtime, chave, tamanho))
+        self._entradas = OrderedDict((chave, tamanho) for _, chave, tamanho in sorted(arquivos))
+        self._total = sum(self._entradas.values())
+
+    def _tamanho(self, chave):
+        """Bytes em disco da entrada (imagem + símbolos), ou None se ela está incompleta."""
+        try:
+            return (os.path.getsize(self._caminho(chave)) +
+                    os.path.getsize(self._caminho(chave, self.EXTENSAO_SIMBOLOS)))
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def chave(linhas):
+        """Hash (SHA-256) da versão do montador e do texto do fonte (sem os finais de linha)."""
+        h = hashlib.sha256(VERSAO_MONTADOR.encode())
+        for linha in linhas:
+            h.update(b"\n")
+            h.update(linha.rstrip("\r\n").encode("utf-8"))
+        return h.hexdigest()
+
+    def _caminho(self, chave, extensao=EXTENSAO):
+        return os.path.join(self.pasta, chave + extensao)
+
+    def montar(self, linhas):
+        """Programa montado das linhas: do cache, se o fonte já foi montado, ou de montar_programa."""
+        linhas = list(linhas)
+        chave = self.chave(linhas)
+        programa = self._ler(chave)
+        if programa is not None:
+            self.hits += 1
+            return programa
+        self.misses += 1
+        programa = montar_programa(linhas)
+        self._gravar(chave, programa)
+        return programa
+
+    def _ler(self, chave):
+        caminho = self._caminho(chave)
+        try:
+            with open(self._caminho(chave, self.EXTENSAO_SIMBOLOS), "r", encoding="utf-8") as f:
+                simbolos = json.load(f)
+            entrada, segmentos = read_image(caminho)
+            rotulos = {str(nome): int(endereco) for nome, endereco in simbolos["rotulos"].items()}
+            constantes = {str(nome): int(valor) for nome, valor in simbolos["constantes"].items()}
+        except FileNotFoundError:
+            self._esquecer(chave)
+            return None
+        except Exception:
+            # Entrada corrompida (gravação interrompida, formato antigo): descarta
+            self._remover(chave)
+            return None
+        # Usada agora: vai para o fim da fila do LRU (e a data do arquivo registra isso).
+        # Uma entrada gravada por outro processo entra no índice (e no total) aqui
+        os.utime(caminho)
+        if chave in self._entradas:
+            self._entradas.move_to_end(chave)
+        else:
+            tamanho = self._tamanho(chave)
+            if tamanho is not None:
+                self._entradas[chave] = tamanho
+                self._total += tamanho
+        return Programa(segmentos, MapaSimbolos(rotulos), constantes, entrada)
+
+    def _gravar(self, chave, programa):
+        caminho = self._caminho(chave)
+        caminho_simbolos = self._caminho(chave, self.EXTENSAO_SIMBOLOS)
+        # Grava em temporários e renomeia: leitores nunca veem um arquivo pela metade.
+        # Os símbolos vão por último, pois sem eles a entrada não é lida
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        temporario_simbolos = f"{caminho_simbolos}.{os.getpid()}.tmp"
+        write_image(temporario, programa.segmentos, programa.entrada)
+        with open(temporario_simbolos, "w", encoding="utf-8") as f:
+            json.dump({"rotulos": programa.simbolos.rotulos, "constantes": programa.constantes}, f)
+        os.replace(temporario, caminho)
+        os.replace(temporario_simbolos, caminho_simbolos)
+        self._esquecer(chave)
+        self._entradas[chave] = self._tamanho(chave) or 0
+        self._total += self._entradas[chave]
+        # LRU: descarta as entradas usadas há mais tempo até caber no limite (a nova fica)
+        while self._total > self.max_bytes and len(self._entradas) > 1:
+            antiga = next(iter(self._entradas))
+            if self._remover(antiga):
+                self.evictions += 1
+            else:
+                # Outro processo já mexeu na pasta: refaz o índice (a nova entrada fica por último)
+                self._varrer()
+                if chave in self._entradas:
+                    self._entradas.move_to_end(chave)
+
+    def _esquecer(self, chave):
+        """Tira a chave do índice (o arquivo já não existe ou vai ser substituído)."""
+        tamanho = self._entradas.pop(chave, None)
+        if tamanho is not None:
+            self._total -= tamanho
+
+    def _remover(self, chave):
+        """Apaga a entrada; retorna False se algum arquivo dela já não existia."""
+        self._esquecer(chave)
+        completa = True
+        for extensao in (self.EXTENSAO, self.EXTENSAO_SIMBOLOS):
+            try:
+                os.remove(self._caminho(chave, extensao))
+            except FileNotFoundError:
+                completa = False
+        return completa
+
+    def stats(self):
+        """Estatísticas do cache (acertos, faltas, descartes, entradas, bytes em disco)."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entradas),
+            "bytes": self._total,
+            "hit_rate": (self.hits / total) if total else 0.0
+        }
+
+
+# GERAÇÃO DA IMAGEM BINÁRIA
+def montar_segmentos(linhas):
+    """
+    Monta as linhas de assembly (montador de dois passos) e agrupa as palavras em
+    segmentos contíguos: cada diretiva ADDRESS começa um novo segmento.
+    Retorna [(endereco, array('I'))].
+    """
+    return montar_programa(linhas).segmentos
+
+def escrever_blocos(blocos, arquivo):
+    """
+    Etapa de escrita do pipeline: grava blocos (endereco, palavras, novo) no formato texto .bin,
+    com uma linha 'address <16 bits>' no início de cada segmento e uma palavra de 32 bits por linha.
+    """
+    for endereco, palavras, novo in blocos:
+        if novo:
+            arquivo.write(f"address {endereco:016b}\n")
+        arquivo.writelines(f"{palavra:032b}\n" for palavra in palavras)
+
+def escrever_bin(segmentos, arquivo):
+    """Grava segmentos (endereco, palavras) no formato texto .bin."""
+    escrever_blocos(((endereco, palavras, True) for endereco, palavras in segmentos), arquivo)
+
+def assemble(linhas):
+    """
+    Montagem em bloco: retorna a imagem plana da memória, array('I') a partir do endereço 0
+    até a última palavra montada (endereços sem instrução ficam zerados).
+    """
+    imagem = array('I')
+    for endereco, palavras in montar_segmentos(linhas):
+        fim = endereco + len(palavras)
+        if fim > len(imagem):
+            imagem.frombytes(bytes(4 * (fim - len(imagem))))
+        imagem[endereco:fim] = palavras
+    return imagem
+
+def gerar_imagem(linhas, caminho):
+    """Monta as linhas de assembly e grava a imagem binária (PC de entrada = primeiro endereço)."""
+    programa = montar_programa(linhas)
+    write_image(caminho, programa.segmentos, programa.entrada)
+    return programa
 
 def main():
-    print("--- GERANDO BINÁRIO ---")
+    """
+    Uso: python interpretador.py [entrada.txt|-] [saida.bin|-] [--img]
+    Padrão: teste.txt -> programa.bin; '-' lê da entrada padrão / escreve na saída padrão.
+    A montagem passa pelo pipeline em fluxo (o fonte não é lido inteiro para a memória),
+    exceto com --img, que junta os segmentos para gravar a imagem compacta.
+    Um arquivo de saída é escrito em um temporário e só vai para o destino se a montagem
+    terminar sem erro; a saída padrão recebe o binário à medida que é montado. Em caso de
+    erro o código de saída é 1.
+    """
+    parser = argparse.ArgumentParser(description="Monta um programa UFLA-RISC no formato .bin.")
+    parser.add_argument("entrada", nargs="?", default="teste.txt",
+                        help="fonte em assembly ('-' = entrada padrão)")
+    parser.add_argument("saida", nargs="?", default="programa.bin",
+                        help="binário gerado ('-' = saída padrão)")
+    parser.add_argument("--img", action="store_true",
+                        help="gera também a imagem binária compacta (.img)")
+    args = parser.parse_args()
+    entrada, saida = args.entrada, args.saida
+    base = "programa" if saida == "-" else os.path.splitext(saida)[0]
+    # Com a saída padrão ocupada pelo binário, as mensagens vão para stderr
+    log = sys.stderr if saida == "-" else sys.stdout
+    print("--- GERANDO BINÁRIO ---", file=log)
 
+    fin = temporario = None
     try:
-        # Lê o arquivo teste.txt e gera programa.bin
-        with open("teste.txt", "r") as fin, open("programa.bin", "w") as fout:
-            for linha in fin:
-                b = montar_instrucao(linha)
-                if b:
-                    fout.write(b + "\n")
-
-        print("SUCESSO! Arquivo 'programa.bin' gerado com as instruções binárias.")
+        fin = sys.stdin if entrada == "-" else open(entrada, "r")
+        if saida == "-":
+            fout = sys.stdout
+        else:
+            fout = temporario = tempfile.NamedTemporaryFile(
+                "w", dir=os.path.dirname(os.path.abspath(saida)), prefix=".tmp_", suffix=".bin", delete=False)
+        inicio = time.perf_counter()
+        montador = Montador()
+        blocos = montador.blocos(tokenizar(fin))
+        segmentos = []
+        if args.img:
+            # Guarda os blocos para a imagem enquanto os escreve no .bin
+            blocos = _guardar_blocos(blocos, segmentos)
+        escrever_blocos(blocos, fout)
+        fout.flush()
+        if temporario is not None:
+            temporario.close()
+            os.replace(temporario.name, saida)
+            temporario = None
+        tempo = time.perf_counter() - inicio
+
+        if saida == "-":
+            print("SUCESSO! Instruções binárias escritas na saída padrão.", file=log)
+        else:
+            print(f"SUCESSO! Arquivo '{saida}' gerado com as instruções binárias.", file=log)
+        print(f"{montador.linhas} linhas em {tempo:.3f} s "
+              f"({montador.linhas / tempo if tempo else 0:.0f} linhas/s)", file=log)
+
+        # Mapa de símbolos ao lado do binário (endereço de cada rótulo)
+        if montador.rotulos:
+            MapaSimbolos(montador.rotulos).salvar(base + ".sym")
+            print(f"SUCESSO! Mapa de símbolos '{base}.sym' gerado.", file=log)
+
+        # Com --img, gera também a imagem binária compacta
+        if args.img:
+            write_image(base + ".img", segmentos, segmentos[0][0] if segmentos else 0)
+            print(f"SUCESSO! Imagem binária '{base}.img' gerada.", file=log)
     except Exception as e:
-        print(f"ERRO: {e}")
+        print(f"ERRO: {e}", file=log)
+        sys.exit(1)
+    finally:
+        if fin is not None and fin is not sys.stdin:
+            fin.close()
+        # Montagem interrompida: descarta o binário parcial
+        if temporario is not None:
+            temporario.close()
+            os.unlink(temporario.name)
+
+def _guardar_blocos(blocos, segmentos):
+    """Repassa os blocos do pipeline, acumulando-os em segmentos (endereco, palavras)."""
+    for endereco, palavras, novo in blocos:
+        if novo:
+            segmentos.append((endereco, array('I', palavras)))
+        else:
+            segmentos[-1][1].extend(palavras)
+        yield endereco, palavras, novo
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,323 @@
+"""
+Compilador Dinâmico (JIT) de Blocos Quentes
+ - Gera código-fonte Python especializado para um bloco básico e o compila com compile()/exec
+ - Registradores ficam em variáveis locais durante o bloco e voltam para o banco na saída
+ - Flags só são calculados quando alguma saída do bloco pode observá-los
+ - Blocos que desviam para o próprio início viram um laço `while` nativo
+"""
+
+from typing import Callable, List
+from events import EV_ERROR, EV_HALT
+from loader import MEMORY_SIZE, WORD_MASK, ALU_EXPLICIT
+from threaded import ESCREVEM_RC
+
+JIT_THRESHOLD = 16          # Execuções de um bloco antes de compilá-lo
+
+# Opcodes que atualizam os flags da ALU
+ESCREVEM_FLAGS = {1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 32, 33, 35, 36}
+# Opcodes que podem encerrar o bloco no meio (erro que para a CPU ou STORE no próprio bloco)
+PODEM_SAIR = {16, 17, 33, 34}
+
+
+def _lidos(opcode: int, ra: int, rb: int, rc: int) -> tuple:
+    """Registradores lidos pela instrução."""
+    if opcode in (1, 2, 4, 5, 7, 8, 9, 10, 11, 20, 21, 32, 33, 34, 38):
+        return (ra, rb)
+    if opcode in (6, 12, 16, 35, 36):
+        return (ra,)
+    if opcode in (14, 15, 19):
+        return (rc,)
+    if opcode == 17:
+        return (ra, rc)
+    return ()
+
+
+def _reg(i: int) -> str:
+    """Expressão de leitura do registrador i (R0 e índices fora do banco valem 0)."""
+    return f"r{i}" if 0 < i < 32 else "0"
+
+
+def _signed(expr: str) -> str:
+    """Expressão que converte uma palavra de 32 bits (em uma variável) para inteiro com sinal."""
+    return f"({expr} - 0x100000000 if {expr} & 0x80000000 else {expr})"
+
+
+def _flags_vivos(instrucoes) -> List[bool]:
+    """
+    Para cada instrução, diz se os flags que ela produz podem ser observados:
+    só não são quando uma instrução seguinte os sobrescreve sem nenhuma saída no meio.
+    """
+    n = len(instrucoes)
+    vivos = [False] * n
+    for i, inst in enumerate(instrucoes):
+        if inst[2] not in ESCREVEM_FLAGS:
+            continue
+        vivos[i] = True
+        for k in range(i + 1, n):
+            opcode = instrucoes[k][2]
+            if opcode in PODEM_SAIR:
+                break               # saída antes (ou no lugar) da próxima escrita
+            if opcode in ESCREVEM_FLAGS:
+                vivos[i] = False    # sobrescrito sem ninguém ver
+                break
+    return vivos
+
+
+class _Gerador:
+    """Monta o código-fonte de um bloco linha a linha, com indentação."""
+
+    def __init__(self, bloco, laco: bool, memory_size: int):
+        self.bloco = bloco
+        self.laco = laco
+        self.memory_size = memory_size
+        self.linhas: List[str] = []
+        self.nivel = 1
+        lidos = set()
+        escritos = set()
+        for _, _, opcode, ra, rb, rc, _, _ in bloco.instrucoes:
+            lidos.update(_lidos(opcode, ra, rb, rc))
+            if opcode == 18:
+                escritos.add(31)
+            elif opcode in ESCREVEM_RC:
+                escritos.add(rc)
+        self.escritos = sorted(r for r in escritos if 0 < r < 32)
+        # Registradores escritos também são carregados: a saída sempre os devolve ao banco
+        self.usados = sorted(r for r in lidos | escritos if 0 < r < 32)
+
+    def emit(self, linha: str):
+        self.linhas.append("    " * self.nivel + linha)
+
+    def saida(self, ciclos: str, palavra: int, pc: str):
+        """Devolve registradores e flags à CPU, acerta IR/PC e retorna os ciclos executados."""
+        for r in self.escritos:
+            self.emit(f"regs[{r}] = r{r}")
+        self.emit("if fres is not None:")
+        self.emit("    state.alu_pending = (fres, ALU_EXPLICIT, False, fcar)")
+        self.emit(f"state.ir = {palavra}")
+        self.emit(f"state.pc = {pc}")
+        self.emit(f"return {ciclos}")
+
+    def ciclos(self, k: int) -> str:
+        """Expressão dos ciclos executados ao sair logo após a instrução de índice k."""
+        return f"n + {k + 1}" if self.laco else str(k + 1)
+
+    def instrucao(self, k: int, inst, flags_vivo: bool):
+        endereco, palavra, opcode, ra, rb, rc, const16, addr24 = inst
+        A, B = _reg(ra), _reg(rb)
+        escreve = 0 < rc < 32
+        C = f"r{rc}"
+        emit = self.emit
+
+        def resultado(expr: str, carry: str = "False", mascara: bool = True):
+            # Escreve o resultado em RC e, se alguém pode ver, guarda os dados dos flags
+            emit(f"t = {expr}")
+            if escreve:
+                emit(f"{C} = t & M" if mascara else f"{C} = t")
+            if flags_vivo:
+                emit("fres = t")
+                emit(f"fcar = {carry}")
+
+        if opcode == 1:     # ADD (overflow nunca é sinalizado: a soma com sinal do Python não transborda)
+            resultado(f"{A} + {B}", carry="t > 0xFFFFFFFF")
+        elif opcode == 2:   # SUB
+            resultado(f"{A} - {B}", carry="t < 0")
+        elif opcode == 3:   # ZEROS
+            resultado("0", mascara=False)
+        elif opcode == 4:   # XOR
+            resultado(f"{A} ^ {B}", mascara=False)
+        elif opcode == 5:   # OR
+            resultado(f"{A} | {B}", mascara=False)
+        elif opcode == 6:   # NOT
+            resultado(f"~{A}")
+        elif opcode == 7:   # AND
+            resultado(f"{A} & {B}", mascara=False)
+        elif opcode in (8, 10):     # ASL / LSL
+            resultado(f"{A} << ({B} & 0x1F)")
+        elif opcode == 9:   # ASR
+            emit(f"a = {A}")
+            resultado(f"{_signed('a')} >> ({B} & 0x1F)")
+        elif opcode == 11:  # LSR
+            resultado(f"{A} >> ({B} & 0x1F)", mascara=False)
+        elif opcode == 12:  # COPY
+            resultado(A, mascara=False)
+        elif opcode == 14:  # LCLH
+            if escreve:
+                emit(f"{C} = {const16 << 16} | ({C} & 0x0000FFFF)")
+        elif opcode == 15:  # LCLL
+            if escreve:
+                emit(f"{C} = ({C} & 0xFFFF0000) | {const16}")
+        elif opcode == 16:  # LOAD
+            emit(f"a = {A}")
+            emit("if a >= MEMORY_SIZE:")
+            self.nivel += 1
+            emit(f'cpu.events.emit(EV_ERROR, {endereco}, f"Erro: Tentativa de leitura em endereço inválido {{a}}")')
+            emit("state.halted = True")
+            self.saida(self.ciclos(k), palavra, str(endereco + 1))
+            self.nivel -= 1
+            if escreve:
+                emit(f"{C} = mem[a]")
+        elif opcode == 17:  # STORE
+            emit(f"a = {_reg(rc)}")
+            emit("try:")
+            emit(f"    write_mem(a, {A})")
+            emit("except IndexError:")
+            self.nivel += 1
+            emit(f'cpu.events.emit(EV_ERROR, {endereco}, f"Erro: Tentativa de escrita em endereço inválido {{a}}")')
+            emit("state.halted = True")
+            self.saida(self.ciclos(k), palavra, str(endereco + 1))
+            self.nivel -= 1
+            # Escrita no próprio bloco: a tradução ficou velha, sai logo após o STORE
+            emit(f"if {self.bloco.inicio} <= a <= {self.bloco.fim}:")
+            self.nivel += 1
+            self.saida(self.ciclos(k), palavra, str(endereco + 1))
+            self.nivel -= 1
+        elif opcode in (33, 34):    # DIV / MOD
+            nome = "" if opcode == 33 else " (MOD)"
+            emit(f"b = {B}")
+            emit(f"sb = {_signed('b')}")
+            emit("if sb == 0:")
+            self.nivel += 1
+            emit(f'cpu.events.emit(EV_ERROR, {endereco}, "Erro: Divisão por zero{nome} em PC={endereco}")')
+            emit("state.halted = True")
+            self.saida(self.ciclos(k), palavra, str(endereco + 1))
+            self.nivel -= 1
+            emit(f"a = {A}")
+            if opcode == 33:
+                resultado(f"int({_signed('a')} / sb)")
+            elif escreve:
+                emit(f"{C} = ({_signed('a')} % sb) & M")
+        elif opcode == 32:  # MUL
+            emit(f"a = {A}")
+            emit(f"b = {B}")
+            resultado(f"{_signed('a')} * {_signed('b')}")
+        elif opcode == 35:  # INC (mesmos 32 bits e flags que a soma com sinal)
+            resultado(f"{A} + 1")
+        elif opcode == 36:  # DEC
+            resultado(f"{A} - 1")
+        elif opcode == 37:  # MOVI
+            if escreve:
+                emit(f"{C} = {const16}")
+        elif opcode == 38:  # NOTBIT (não altera flags)
+            if escreve:
+                emit(f"{C} = ~({A} & {B}) & M")
+        # NOP (39): nada a fazer
+
+    def terminador(self, k: int, inst):
+        endereco, palavra, opcode, ra, rb, rc, const16, addr24 = inst
+        A, B = _reg(ra), _reg(rb)
+        proximo = str(endereco + 1)
+        ciclos = self.ciclos(k)
+        emit = self.emit
+        if opcode == 18:    # JAL
+            emit(f"r31 = {endereco + 1}")
+            self._salto(ciclos, palavra, str(addr24), addr24 < self.memory_size)
+        elif opcode == 19:  # JR
+            self._salto(ciclos, palavra, _reg(rc), False)
+        elif opcode in (20, 21):    # BEQ / BNE
+            cond = f"{A} == {B}" if opcode == 20 else f"{A} != {B}"
+            if self.laco:
+                # Desvio para o próprio início: continua o laço enquanto houver orçamento
+                emit("n += %d" % (k + 1))
+                emit(f"if {cond}:")
+                emit(f"    if n + {k + 1} <= max_cycles:")
+                emit("        continue")
+                self.nivel += 1
+                self.saida("n", palavra, str(rc))
+                self.nivel -= 1
+                self.saida("n", palavra, proximo)
+            else:
+                emit(f"if {cond}:")
+                self.nivel += 1
+                self.saida(ciclos, palavra, str(rc))
+                self.nivel -= 1
+                self.saida(ciclos, palavra, proximo)
+        elif opcode == 22:  # J
+            if self.laco:
+                emit("n += %d" % (k + 1))
+                emit(f"if n + {k + 1} <= max_cycles:")
+                emit("    continue")
+                self.saida("n", palavra, str(addr24))
+            else:
+                self._salto(ciclos, palavra, str(addr24), addr24 < self.memory_size)
+        else:               # HALT
+            emit(f'cpu.events.emit(EV_HALT, {endereco}, "PC({endereco}): HALT encontrado.")')
+            emit("state.halted = True")
+            self.saida(ciclos, palavra, proximo)
+
+    def _salto(self, ciclos: str, palavra: int, alvo: str, alvo_valido: bool):
+        """Saída por desvio incondicional; alvos não garantidos passam pelo set_pc (que valida)."""
+        if alvo_valido:
+            self.saida(ciclos, palavra, alvo)
+            return
+        for r in self.escritos:
+            self.emit(f"regs[{r}] = r{r}")
+        self.emit("if fres is not None:")
+        self.emit("    state.alu_pending = (fres, ALU_EXPLICIT, False, fcar)")
+        self.emit(f"state.ir = {palavra}")
+        self.emit(f"state.pc = {self.bloco.fim + 1}")
+        self.emit(f"set_pc({alvo})")
+        self.emit(f"return {ciclos}")
+
+
+def eh_laco(bloco) -> bool:
+    """Verdadeiro se o bloco termina em um desvio para o próprio início (laço compilado)."""
+    ultimo = bloco.instrucoes[-1]
+    return bloco.terminado and (
+        (ultimo[2] in (20, 21) and ultimo[5] == bloco.inicio) or
+        (ultimo[2] == 22 and ultimo[7] == bloco.inicio))
+
+
+def gerar_fonte(bloco, memory_size: int = MEMORY_SIZE) -> str:
+    """Gera o código-fonte Python da função `bloco(max_cycles) -> ciclos executados`."""
+    instrucoes = bloco.instrucoes
+    ultimo = instrucoes[-1]
+    laco = eh_laco(bloco)
+    g = _Gerador(bloco, laco, memory_size)
+    g.emit("state = cpu.state")
+    g.emit("regs = state.regs")
+    g.emit("mem = cpu.memory")
+    for r in g.usados:
+        g.emit(f"r{r} = regs[{r}]")
+    g.emit("fres = None")
+    g.emit("fcar = False")
+
+    if laco:
+        g.emit("n = 0")
+        g.emit("while True:")
+        g.nivel += 1
+
+    vivos = _flags_vivos(instrucoes)
+    corpo = instrucoes[:-1] if bloco.terminado else instrucoes
+    for k, inst in enumerate(corpo):
+        g.emit(f"# {inst[0]}: 0x{inst[1]:08X}")
+        g.instrucao(k, inst, vivos[k])
+
+    if bloco.terminado:
+        g.emit(f"# {ultimo[0]}: 0x{ultimo[1]:08X}")
+        g.terminador(len(corpo), ultimo)
+    else:
+        g.saida(str(len(corpo)), corpo[-1][1], str(bloco.fim + 1))
+
+    cabecalho = f"def bloco(max_cycles):\n"
+    return cabecalho + "\n".join(g.linhas) + "\n"
+
+
+def compilar_bloco(cpu, bloco) -> Callable[[int], int]:
+    """Compila o bloco para uma função nativa Python e a guarda em bloco.compilado."""
+    fonte = gerar_fonte(bloco, cpu.memory_size)
+    codigo = compile(fonte, f"<jit bloco {bloco.inicio}-{bloco.fim}>", "exec")
+    namespace = {
+        "cpu": cpu,
+        "ALU_EXPLICIT": ALU_EXPLICIT,
+        "EV_ERROR": EV_ERROR,
+        "EV_HALT": EV_HALT,
+        "write_mem": cpu.write_mem,
+        "set_pc": cpu.set_pc,
+        "M": WORD_MASK,
+        "MEMORY_SIZE": cpu.memory_size,
+    }
+    exec(codigo, namespace)
+    funcao = namespace["bloco"]
+    funcao.fonte = fonte
+    bloco.compilado = funcao
+    return funcao
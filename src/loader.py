@@ -1,12 +1,53 @@
-from dataclasses import dataclass, field
-from typing import List, Tuple, Optional
+from array import array
+from dataclasses import dataclass
+from typing import Iterable, List, Tuple, Optional, Sequence
+import mmap
+import re
+import struct
 import sys
 
 # --- CONSTANTES GLOBAIS ---
+ADDRESS_BITS = 16           # Largura padrão do endereço de palavra
 MEMORY_SIZE = 65536         # 64K palavras (word-addressed)
 WORD_MASK = 0xFFFFFFFF      # 32-bit mask (garante 32 bits unsigned)
 REG_COUNT = 32              # 32 registradores de uso geral
 
+# Representações possíveis da memória principal:
+#  - "list":  lista Python de inteiros (acesso mais rápido por palavra)
+#  - "array": array('I') contíguo de uint32 (metade da memória, criação e zeragem em bloco,
+#             fatias sem cópia via memoryview)
+#  - "paged": páginas de 256 palavras alocadas na primeira escrita (memórias grandes e esparsas)
+MEMORY_BACKENDS = ("list", "array", "paged")
+# "list" e "array" alocam a memória inteira na criação: a largura do endereço é limitada
+# (2**24 palavras); larguras maiores só com "paged"
+FLAT_ADDRESS_BITS_MAX = 24
+
+# Paginação da memória esparsa
+PAGE_BITS = 8
+PAGE_SIZE = 1 << PAGE_BITS      # 256 palavras por página
+PAGE_MASK = PAGE_SIZE - 1
+
+# Imagem binária de código de máquina (.img):
+#   cabeçalho  "URIM", versão (u16), nº de segmentos (u16), PC de entrada (u32)
+#   segmentos  endereço de carga (u32), nº de palavras (u32), palavras uint32 little-endian
+IMAGE_MAGIC = b"URIM"
+IMAGE_VERSION = 1
+IMAGE_HEADER = struct.Struct("<4sHHI")
+SEGMENT_HEADER = struct.Struct("<II")
+
+# Leitura rápida do formato texto: cada trecho é uma sequência de linhas de 32 bits
+# (vira palavras de uma vez só), uma diretiva address, um comentário ou uma linha em branco.
+# Qualquer outra coisa faz o carregador voltar para a leitura linha a linha.
+_TEXT_TOKEN = re.compile(
+    r"((?:[01]{32}\n)+)"
+    r"|[ \t]*[aA][dD][dD][rR][eE][sS][sS][ \t]+([01]+)[ \t]*\n"
+    r"|[ \t]*(?:#|//)[^\n]*\n"
+    r"|[ \t]*\n"
+)
+
+class RegisterIndexError(IndexError):
+    """Acesso a um registrador fora de R0-R31."""
+
 @dataclass
 class Flags:
     """Representa os flags de condição (neg, zero, carry, overflow)."""
@@ -19,27 +60,266 @@ class Flags:
         """Retorna os flags como um dicionário para logs."""
         return {"neg": self.neg, "zero": self.zero, "carry": self.carry, "overflow": self.overflow}
 
-@dataclass
+# Tipos de operação da ALU com flags pendentes (avaliação preguiçosa dos flags)
+ALU_LOGIC = 0       # overflow e carry ficam em 0
+ALU_ADD = 1         # guarda os operandos para calcular overflow/carry da soma
+ALU_SUB = 2         # guarda os operandos para calcular overflow/carry da subtração
+ALU_EXPLICIT = 3    # overflow e carry já calculados por quem registrou
+
+@dataclass(init=False, repr=False, eq=False)
 class CPUState:
     """Representa o estado interno da CPU (registradores, PC, IR, flags, estado de parada)."""
-    regs: List[int] = field(default_factory=lambda: [0]*REG_COUNT)  # 32 registradores de 32 bits
-    pc: int = 0         # Program Counter (endereço de palavra, 16 bits)
-    ir: int = 0         # Instruction Register (palavra de 32 bits)
-    flags: Flags = field(default_factory=Flags)
-    halted: bool = False
+    regs: List[int]     # 32 registradores de 32 bits
+    pc: int             # Program Counter (endereço de palavra, 16 bits)
+    ir: int             # Instruction Register (palavra de 32 bits)
+    _flags: Flags
+    halted: bool
+    # Última operação da ALU cujos flags ainda não foram calculados:
+    # (resultado, tipo ALU_*, a, b). Os flags só são montados quando alguém lê state.flags
+    alu_pending: Optional[tuple]
+
+    def __init__(self, regs: Optional[List[int]] = None, pc: int = 0, ir: int = 0,
+                 flags: Optional[Flags] = None, halted: bool = False,
+                 alu_pending: Optional[tuple] = None):
+        # `flags` continua sendo o parâmetro do construtor; o campo guardado é `_flags`
+        # (lido pela propriedade flags, que antes aplica a operação pendente da ALU)
+        self.regs = [0] * REG_COUNT if regs is None else regs
+        self.pc = pc
+        self.ir = ir
+        self._flags = Flags() if flags is None else flags
+        self.halted = halted
+        self.alu_pending = alu_pending
+
+    # _flags fica desatualizado enquanto há operação pendente: comparação e repr usam flags
+    def __eq__(self, other):
+        if not isinstance(other, CPUState):
+            return NotImplemented
+        return (self.regs == other.regs and self.pc == other.pc and self.ir == other.ir and
+                self.flags == other.flags and self.halted == other.halted)
+
+    def __repr__(self):
+        return (f"CPUState(regs={self.regs!r}, pc={self.pc!r}, ir={self.ir!r}, "
+                f"flags={self.flags!r}, halted={self.halted!r})")
+
+    @property
+    def flags(self) -> Flags:
+        """Flags de condição (calculados na hora a partir da última operação da ALU)."""
+        if self.alu_pending is not None:
+            self._materialize_flags()
+        return self._flags
+
+    @flags.setter
+    def flags(self, value: Flags):
+        self._flags = value
+        self.alu_pending = None
+
+    def _materialize_flags(self):
+        """Converte a operação pendente da ALU nos quatro flags."""
+        result, kind, a, b = self.alu_pending
+        self.alu_pending = None
+        overflow = carry = False
+        if kind == ALU_ADD:
+            sa = MemoryLoader.uint32_to_signed(a)
+            sb = MemoryLoader.uint32_to_signed(b)
+            res_signed = sa + sb
+            overflow = (sa > 0 and sb > 0 and res_signed < 0) or \
+                       (sa < 0 and sb < 0 and res_signed > 0)
+            carry = (a + b) > 0xFFFFFFFF
+        elif kind == ALU_SUB:
+            sa = MemoryLoader.uint32_to_signed(a)
+            sb = MemoryLoader.uint32_to_signed(b)
+            res_signed = sa - sb
+            overflow = (sa > 0 and sb < 0 and res_signed < 0) or \
+                       (sa < 0 and sb > 0 and res_signed > 0)
+            carry = a < b
+        elif kind == ALU_EXPLICIT:
+            overflow, carry = a, b
+        flags = self._flags
+        flags.zero = 1 if (result & WORD_MASK) == 0 else 0
+        flags.neg = 1 if (result & (1 << 31)) else 0
+        flags.overflow = 1 if overflow else 0
+        flags.carry = 1 if carry else 0
+
+class PagedMemory:
+    """
+    Memória esparsa: só as páginas que já receberam alguma escrita diferente de zero
+    existem. Leituras de páginas nunca escritas usam uma única página de zeros
+    compartilhada. Acesso por índice como uma lista (memory[addr], memory[addr] = v).
+    """
+
+    __slots__ = ("size", "pages")
+
+    ZERO_PAGE = array('I', bytes(4 * PAGE_SIZE))
+
+    def __init__(self, size: int):
+        self.size = size
+        self.pages: dict = {}   # número da página -> array('I') de PAGE_SIZE palavras
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, address):
+        if isinstance(address, slice):
+            return [self[a] for a in range(*address.indices(self.size))]
+        if not 0 <= address < self.size:
+            raise IndexError("memory index out of range")
+        return self.pages.get(address >> PAGE_BITS, self.ZERO_PAGE)[address & PAGE_MASK]
+
+    def __setitem__(self, address: int, value: int):
+        if not 0 <= address < self.size:
+            raise IndexError("memory index out of range")
+        page = self.pages.get(address >> PAGE_BITS)
+        if page is None:
+            if value == 0:
+                return      # a página continua implícita (só zeros)
+            page = self.pages[address >> PAGE_BITS] = array('I', self.ZERO_PAGE)
+        page[address & PAGE_MASK] = value
+
+    def __iter__(self):
+        # size é sempre múltiplo de PAGE_SIZE (address_bits >= PAGE_BITS)
+        for numero in range(self.size >> PAGE_BITS):
+            yield from self.pages.get(numero, self.ZERO_PAGE)
+
+    def __sizeof__(self) -> int:
+        return (object.__sizeof__(self) + sys.getsizeof(self.pages) +
+                sum(sys.getsizeof(page) for page in self.pages.values()))
+
+    def region(self, start: int, end: int) -> List[int]:
+        """Cópia das palavras de [start, end] (inclusive), montada página a página."""
+        out: List[int] = []
+        addr = start
+        while addr <= end:
+            numero = addr >> PAGE_BITS
+            fim_pagina = min(end, (numero << PAGE_BITS) | PAGE_MASK)
+            page = self.pages.get(numero, self.ZERO_PAGE)
+            out.extend(page[addr & PAGE_MASK:(fim_pagina & PAGE_MASK) + 1])
+            addr = fim_pagina + 1
+        return out
+
+    def store_block(self, start: int, words: array):
+        """Copia `words` a partir de `start`, página a página (trechos só de zeros não alocam)."""
+        pos = 0
+        while pos < len(words):
+            addr = start + pos
+            numero = addr >> PAGE_BITS
+            offset = addr & PAGE_MASK
+            n = min(PAGE_SIZE - offset, len(words) - pos)
+            trecho = words[pos:pos + n]
+            page = self.pages.get(numero)
+            if page is None and any(trecho):
+                page = self.pages[numero] = array('I', self.ZERO_PAGE)
+            if page is not None:
+                page[offset:offset + n] = trecho
+            pos += n
+
+    def clear(self):
+        """Descarta todas as páginas (a memória volta a ser só zeros)."""
+        self.pages.clear()
+
+
+def _words_le(words) -> array:
+    """Palavras como array('I') na ordem de bytes little-endian (a da imagem)."""
+    words = array('I', words)
+    if sys.byteorder != "little":
+        words.byteswap()
+    return words
+
+
+def write_image(filepath: str, segments: Iterable[Tuple[int, Sequence[int]]],
+                entry_pc: Optional[int] = None):
+    """
+    Grava uma imagem binária com os segmentos (endereço, palavras).
+    Sem entry_pc, o PC de entrada é o endereço do primeiro segmento.
+    """
+    segments = [(address, _words_le(words)) for address, words in segments]
+    if entry_pc is None:
+        entry_pc = segments[0][0] if segments else 0
+    with open(filepath, 'wb') as f:
+        f.write(IMAGE_HEADER.pack(IMAGE_MAGIC, IMAGE_VERSION, len(segments), entry_pc))
+        for address, words in segments:
+            f.write(SEGMENT_HEADER.pack(address, len(words)))
+            words.tofile(f)
+
+
+def read_image(filepath: str) -> Tuple[int, List[Tuple[int, array]]]:
+    """
+    Lê uma imagem binária (ver write_image): o arquivo é mapeado em memória e cada
+    segmento é copiado em bloco. Retorna (entry_pc, [(endereço, array('I'))]).
+    """
+    segments = []
+    with open(filepath, 'rb') as f, \
+         mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if len(mm) < IMAGE_HEADER.size:
+            raise ValueError("Truncated image header.")
+        magic, version, count, entry_pc = IMAGE_HEADER.unpack_from(mm, 0)
+        if magic != IMAGE_MAGIC:
+            raise ValueError("Not a UFLA-RISC image (bad magic).")
+        if version != IMAGE_VERSION:
+            raise ValueError(f"Unsupported image version {version}.")
+        offset = IMAGE_HEADER.size
+        for index in range(count):
+            if offset + SEGMENT_HEADER.size > len(mm):
+                raise ValueError(f"Truncated header of segment {index}.")
+            address, n_words = SEGMENT_HEADER.unpack_from(mm, offset)
+            offset += SEGMENT_HEADER.size
+            end = offset + 4 * n_words
+            if end > len(mm):
+                raise ValueError(f"Truncated data of segment {index}.")
+            words = array('I')
+            with memoryview(mm)[offset:end] as raw:
+                words.frombytes(raw)
+            if sys.byteorder != "little":
+                words.byteswap()
+            segments.append((address, words))
+            offset = end
+    return entry_pc, segments
+
+
+def is_image_file(filepath: str) -> bool:
+    """Indica se o arquivo começa com a assinatura de imagem binária."""
+    try:
+        with open(filepath, 'rb') as f:
+            return f.read(len(IMAGE_MAGIC)) == IMAGE_MAGIC
+    except OSError:
+        return False
 
 class MemoryLoader:
     """
-    Gerencia a memória principal (64K palavras), o estado da CPU e as 
+    Gerencia a memória principal (64K palavras por padrão), o estado da CPU e as 
     funções de I/O (carregador, leitura/escrita).
     """
 
-    def __init__(self):
+    def __init__(self, memory_backend: str = "list", address_bits: int = ADDRESS_BITS):
+        """
+        Args:
+            memory_backend: Representação da memória principal ("list", "array" ou "paged")
+            address_bits: Largura do endereço de palavra (a memória tem 2**address_bits palavras)
+        """
+        if memory_backend not in MEMORY_BACKENDS:
+            raise ValueError(f"Unknown memory backend '{memory_backend}'. Options: {MEMORY_BACKENDS}")
+        if not (PAGE_BITS <= address_bits <= 32):
+            raise ValueError(f"Invalid address width {address_bits}. Valid: {PAGE_BITS}..32 bits")
+        if memory_backend != "paged" and address_bits > FLAT_ADDRESS_BITS_MAX:
+            raise ValueError(f"Address width {address_bits} too large for the '{memory_backend}' backend "
+                             f"(max {FLAT_ADDRESS_BITS_MAX} bits). Use memory_backend='paged'.")
+        self.memory_backend = memory_backend
+        self.address_bits = address_bits
+        self.memory_size = 1 << address_bits
         # Memória: cada entrada é uma palavra de 32 bits (unsigned)
-        self.memory: List[int] = [0] * MEMORY_SIZE
+        if memory_backend == "array":
+            self.memory = array('I', bytes(4 * self.memory_size))
+        elif memory_backend == "paged":
+            self.memory = PagedMemory(self.memory_size)
+        else:
+            self.memory: List[int] = [0] * self.memory_size
         self.state = CPUState()
         # Endereços modificados (útil para logs da Pessoa 5)
         self._modified_addresses: set = set()
+        # Cache de instruções pré-decodificadas (endereço -> campos já separados),
+        # preenchido pela CPU na primeira busca e invalidado por write_mem
+        self._decoded: dict = {}
+        self.decode_hits = 0
+        self.decode_misses = 0
 
     # ---------- utilitários de conversão e bits ----------
     @staticmethod
@@ -87,17 +367,54 @@ class MemoryLoader:
         # Garante que o valor se encaixe em 32 bits
         self.memory[address] = value & WORD_MASK
         self._modified_addresses.add(address)
+        # Código auto-modificável: descarta a decodificação antiga deste endereço
+        if address in self._decoded:
+            self._invalidate_code(address)
+
+    def reset_memory(self):
+        """Zera toda a memória no próprio lugar (sem realocar) e descarta os caches de código."""
+        if self.memory_backend == "array":
+            memoryview(self.memory).cast('B')[:] = bytes(4 * len(self.memory))
+        elif self.memory_backend == "paged":
+            self.memory.clear()
+        else:
+            self.memory[:] = [0] * len(self.memory)
+        self._modified_addresses.clear()
+        self._clear_code_caches()
+
+    def memory_view(self, start: int, end: int) -> Sequence[int]:
+        """
+        Palavras do intervalo [start, end] (inclusive). No backend "array" é um
+        memoryview sobre a própria memória (sem cópia); nos demais é uma cópia da fatia.
+        """
+        if start < 0 or end >= self.memory_size or start > end:
+            raise IndexError("Invalid memory view range.")
+        if self.memory_backend == "array":
+            return memoryview(self.memory)[start:end+1]
+        if self.memory_backend == "paged":
+            return self.memory.region(start, end)
+        return self.memory[start:end+1]
+
+    def _invalidate_code(self, address: int):
+        """Descarta tudo que foi derivado da instrução guardada em `address`."""
+        del self._decoded[address]
+
+    def _clear_code_caches(self):
+        """Esvazia os caches de código (decodificação) e zera os contadores."""
+        self._decoded.clear()
+        self.decode_hits = 0
+        self.decode_misses = 0
 
     def _check_address(self, address: int):
         """Verifica se o endereço está dentro dos limites da memória."""
-        if not (0 <= address < MEMORY_SIZE):
-            raise IndexError(f"Memory address out of range: {address}. Valid: 0..{MEMORY_SIZE-1}")
+        if not (0 <= address < self.memory_size):
+            raise IndexError(f"Memory address out of range: {address}. Valid: 0..{self.memory_size-1}")
 
     # ---------- registradores e estado ----------
     def read_reg(self, reg_index: int) -> int:
         """Lê o valor de um registrador (R0-R31). R0 sempre retorna 0."""
         if reg_index < 0 or reg_index >= REG_COUNT:
-            raise IndexError(f"Register index out of range: {reg_index}")
+            raise RegisterIndexError(f"Register index out of range: {reg_index}")
         # R0 é sempre 0 por convenção RISC
         if reg_index == 0:
             return 0
@@ -106,7 +423,7 @@ class MemoryLoader:
     def write_reg(self, reg_index: int, value: int):
         """Escreve um valor em um registrador (R1-R31). Ignora escrita em R0."""
         if reg_index < 0 or reg_index >= REG_COUNT:
-            raise IndexError(f"Register index out of range: {reg_index}")
+            raise RegisterIndexError(f"Register index out of range: {reg_index}")
         # R0 é sempre 0 e a escrita é ignorada (Write Back - WB)
         if reg_index != 0:
             self.state.regs[reg_index] = value & WORD_MASK
@@ -120,6 +437,7 @@ class MemoryLoader:
         self.state.flags = Flags()
         self.state.halted = False
         self._modified_addresses.clear()
+        self._clear_code_caches()
 
     def fetch_instruction(self) -> int:
         """
@@ -132,14 +450,14 @@ class MemoryLoader:
 
     def set_pc(self, value:int):
         """Define o valor do Program Counter (PC). Usado para Jumps."""
-        if not (0 <= value < MEMORY_SIZE):
+        if not (0 <= value < self.memory_size):
             raise IndexError("PC out of range.")
         self.state.pc = value
 
     def incr_pc(self, step:int=1):
         """Incrementa o Program Counter (PC). Usado no IF (Instrução Fetch)."""
         new_pc = self.state.pc + step
-        if not (0 <= new_pc < MEMORY_SIZE):
+        if not (0 <= new_pc < self.memory_size):
             raise IndexError("PC out of range after increment.")
         self.state.pc = new_pc
 
@@ -148,8 +466,84 @@ class MemoryLoader:
     def load_from_file(self, filepath: str, verbose: bool = False) -> Tuple[int,int]:
         """
         Carrega as instruções de um arquivo binário (gerado pela Pessoa 1) na memória.
+        Aceita o formato texto ('0'/'1' por linha) e a imagem binária (ver load_image).
         Retorna (first_address_loaded, last_address_loaded).
         """
+        if is_image_file(filepath):
+            return self.load_image(filepath, verbose)
+
+        # Caminho rápido (conversão em bloco); o modo verbose e os arquivos fora do
+        # padrão (ou com erro, para a mensagem com o número da linha) vão linha a linha
+        segments = None if verbose else self._parse_text_segments(filepath)
+        if segments is not None:
+            self.init_registers()
+            try:
+                first_loaded, last_loaded = self.load_segments(segments)
+            except IndexError:
+                pass
+            else:
+                if first_loaded < 0:
+                    return (-1, -1)
+                self.state.pc = first_loaded
+                return (first_loaded, last_loaded)
+        return self._load_text_by_line(filepath, verbose)
+
+    def load_program(self, segments: Iterable[Tuple[int, Sequence[int]]]) -> Tuple[int, int]:
+        """
+        Carrega um programa já montado em memória (segmentos (endereço, palavras), como os
+        de montar_segmentos), sem passar por arquivo. Mesmo efeito de load_from_file no .bin
+        equivalente: registradores zerados e PC no primeiro endereço carregado.
+        Retorna (first_address_loaded, last_address_loaded), ou (-1, -1) se nada foi carregado.
+        """
+        self.init_registers()
+        first_loaded, last_loaded = self.load_segments(segments)
+        if first_loaded >= 0:
+            self.state.pc = first_loaded
+        return (first_loaded, last_loaded)
+
+    @staticmethod
+    def _parse_text_segments(filepath: str) -> Optional[List[Tuple[int, array]]]:
+        """
+        Lê o arquivo texto inteiro e converte cada sequência de linhas de 32 bits em um
+        array('I') de uma só vez: as linhas são concatenadas, viram um único inteiro
+        (int(..., 2)) e os bytes dele são copiados para o array. Retorna os segmentos
+        (endereço, palavras), ou None se o arquivo não está no formato simples.
+        """
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+        if '\r' in text:
+            text = text.replace('\r', '')
+        if text and not text.endswith('\n'):
+            text += '\n'
+
+        segments = []
+        current_address = 0
+        pos = 0
+        match = _TEXT_TOKEN.match
+        while pos < len(text):
+            token = match(text, pos)
+            if token is None:
+                return None
+            pos = token.end()
+            run, address = token.group(1, 2)
+            if run is not None:
+                bits = run.replace('\n', '')
+                count = len(bits) // 32
+                words = array('I')
+                words.frombytes(int(bits, 2).to_bytes(4 * count, 'big'))
+                if sys.byteorder == "little":
+                    words.byteswap()
+                segments.append((current_address, words))
+                current_address += count
+            elif address is not None:
+                current_address = int(address, 2)
+        return segments
+
+    def _load_text_by_line(self, filepath: str, verbose: bool = False) -> Tuple[int,int]:
+        """Carregador do formato texto linha a linha (valida e reporta erros por linha)."""
         self.init_registers() # Limpa o estado antes de carregar
         
         current_address = 0
@@ -182,7 +576,7 @@ class MemoryLoader:
                         
                     word = self._binstr_to_uint32(bits)
                     
-                    if not (0 <= current_address < MEMORY_SIZE):
+                    if not (0 <= current_address < self.memory_size):
                         raise IndexError(f"Memory address {current_address} out of range while loading (line {lineno}).")
                         
                     self.write_mem(current_address, word)
@@ -210,16 +604,78 @@ class MemoryLoader:
         self.state.pc = first_loaded
         return (first_loaded, last_loaded)
 
+    def load_image(self, filepath: str, verbose: bool = False) -> Tuple[int, int]:
+        """
+        Carrega uma imagem binária (ver read_image) com os segmentos copiados em bloco.
+        O PC passa a ser o PC de entrada do cabeçalho.
+        Retorna (first_address_loaded, last_address_loaded).
+        """
+        self.init_registers()
+        try:
+            entry_pc, segments = read_image(filepath)
+            if not (0 <= entry_pc < self.memory_size):
+                raise IndexError(f"Entry PC {entry_pc} out of range.")
+            first, last = self.load_segments(segments)
+        except FileNotFoundError:
+            print(f"ERRO FATAL: Arquivo de imagem '{filepath}' não encontrado.")
+            sys.exit(1)
+        except Exception as e:
+            print(f"ERRO durante o carregamento da imagem '{filepath}': {e}")
+            sys.exit(1)
+
+        if verbose:
+            for address, words in segments:
+                print(f"[Loader] segmento: {len(words)} palavras em {address}..{address + len(words) - 1}")
+            print(f"[Loader] PC de entrada = {entry_pc}")
+        self.state.pc = entry_pc
+        return (first, last)
+
+    def load_segments(self, segments: Iterable[Tuple[int, Sequence[int]]]) -> Tuple[int, int]:
+        """
+        Copia segmentos (endereço, palavras) para a memória em bloco, com o mesmo efeito
+        de um write_mem por palavra (endereços modificados e caches de código).
+        Retorna (first_address_loaded, last_address_loaded), ou (-1, -1) se nada foi carregado.
+        """
+        first_loaded = last_loaded = -1
+        for address, words in segments:
+            words = words if isinstance(words, array) and words.typecode == 'I' else array('I', words)
+            n = len(words)
+            if n == 0:
+                continue
+            end = address + n
+            if address < 0 or end > self.memory_size:
+                raise IndexError(f"Segment {address}..{end - 1} out of memory range "
+                                 f"(0..{self.memory_size - 1}).")
+            if self.memory_backend == "paged":
+                self.memory.store_block(address, words)
+            else:
+                # Mesmo tamanho dos dois lados: a lista não muda de comprimento
+                self.memory[address:end] = words
+            self._modified_addresses.update(range(address, end))
+            if self._decoded:
+                for addr in [a for a in self._decoded if address <= a < end]:
+                    self._invalidate_code(addr)
+            if first_loaded < 0:
+                first_loaded = address
+            last_loaded = end - 1
+        return (first_loaded, last_loaded)
+
+    def decode_cache_stats(self) -> dict:
+        """Estatísticas do cache de instruções pré-decodificadas (acertos, faltas, entradas)."""
+        total = self.decode_hits + self.decode_misses
+        return {
+            "hits": self.decode_hits,
+            "misses": self.decode_misses,
+            "entries": len(self._decoded),
+            "hit_rate": (self.decode_hits / total) if total else 0.0
+        }
+
     # ---------- dumps / logs ----------
     def dump_memory_region(self, start: int, end: int) -> List[Tuple[int, str]]:
         """Retorna lista (addr, binstr) para intervalo [start, end] (inclusive)."""
-        if start < 0 or end >= MEMORY_SIZE or start > end:
+        if start < 0 or end >= self.memory_size or start > end:
             raise IndexError("Invalid memory dump range.")
-        out = []
-        for addr in range(start, end+1):
-            word = self.memory[addr]
-            out.append((addr, f"{word:032b}"))
-        return out
+        return [(addr, f"{word:032b}") for addr, word in enumerate(self.memory_view(start, end), start)]
 
     def dump_registers(self) -> List[Tuple[int, int, int]]:
         """Retorna uma lista de (reg_index, value_unsigned, value_signed)."""
@@ -2,11 +2,166 @@
 Módulo de Logging para o Simulador UFLA-RISC
 Cria logs detalhados de cada ciclo de execução
 Mostra as diferenças de estado (registradores, memória, PC, IR, flags) após cada instrução
+ - As escritas em registradores chegam pelo gancho reg_written e as de memória pela lista
+   dirty_addresses (ambos alimentados pela CPULogged), então cada ciclo custa só o que foi
+   escrito nele, sem cópias do estado inteiro nem varreduras de todos os endereços já escritos
+ - Modo "caixa-preta" (trace_size=K): guarda só os últimos K ciclos em um buffer circular
+   pré-alocado, com memória constante em execuções longas
+ - Cada ciclo vira um CycleLog só com inteiros; os textos (IR em binário/hexa, instrução,
+   valores com sinal) são montados apenas quando o log é impresso, salvo ou lido
+ - Modo em fluxo (start_stream): cada ciclo é escrito no arquivo assim que é registrado,
+   por um buffer grande (e comprimido com gzip/lzma conforme a extensão .gz/.xz), sem
+   guardar os logs em memória; save_logs_to_file e get_summary passam a usar o arquivo
 """
 
-from typing import Dict, List, Tuple, Optional
-from loader import MemoryLoader, Flags
-import copy
+import gzip
+import io
+import lzma
+import os
+import shutil
+import sys
+from typing import Dict, List, Optional
+from loader import MemoryLoader
+
+# Mapeamento de opcodes para nomes (para logs legíveis)
+OPCODE_NAMES = {
+    1: "ADD", 2: "SUB", 3: "ZEROS", 4: "XOR", 5: "OR", 6: "NOT",
+    7: "AND", 8: "ASL", 9: "ASR", 10: "LSL", 11: "LSR", 12: "COPY",
+    14: "LCLH", 15: "LCLL", 16: "LOAD", 17: "STORE",
+    18: "JAL", 19: "JR", 20: "BEQ", 21: "BNE", 22: "J",
+    32: "MUL", 33: "DIV", 34: "MOD", 35: "INC", 
+    36: "DEC", 37: "MOVI", 38: "NOTBIT", 39: "NOP",
+    255: "HALT"
+}
+
+FLAG_NAMES = ("neg", "zero", "carry", "overflow")
+
+
+def format_instruction(name: str, ra: int, rb: int, rc: int, const16: int, addr24: int) -> str:
+    """Formata a instrução de forma legível."""
+    if name == "HALT":
+        return "HALT"
+    elif name == "NOP":
+        return "NOP"
+    elif name in ["ADD", "SUB", "XOR", "OR", "AND", "ASL", "ASR", "LSL", "LSR", "MUL", "DIV", "MOD", "NOTBIT"]:
+        return f"{name} R{rc}, R{ra}, R{rb}"
+    elif name in ["NOT", "COPY", "INC", "DEC"]:
+        return f"{name} R{rc}, R{ra}"
+    elif name in ["ZEROS", "JR"]:
+        return f"{name} R{rc}"
+    elif name in ["LCLH", "LCLL", "MOVI"]:
+        return f"{name} R{rc}, {const16}"
+    elif name in ["LOAD", "STORE"]:
+        return f"{name} R{rc}, R{ra}"
+    elif name in ["BEQ", "BNE"]:
+        return f"{name} R{ra}, R{rb}, {rc}"
+    elif name in ["J", "JAL"]:
+        return f"{name} {addr24}"
+    else:
+        return f"{name} (opcode desconhecido)"
+
+
+def describe_instruction(ir: int) -> str:
+    """Decodifica a palavra da instrução para a forma legível do log (ex.: "ADD R3, R1, R2")."""
+    extract_field = MemoryLoader.extract_field
+    opcode = extract_field(ir, 24, 31)
+    instr_name = OPCODE_NAMES.get(opcode, f"UNKNOWN({opcode})")
+    
+    # Extrai campos da instrução
+    ra_idx = extract_field(ir, 16, 23)
+    rb_idx = extract_field(ir, 8, 15)
+    rc_idx = extract_field(ir, 0, 7)
+    const16 = extract_field(ir, 8, 23)
+    addr24 = extract_field(ir, 0, 23)
+    return format_instruction(instr_name, ra_idx, rb_idx, rc_idx, const16, addr24)
+
+
+LOG_BUFFER_SIZE = 1 << 20      # bytes do buffer de escrita do log em fluxo
+
+
+def open_log_stream(filepath: str):
+    """
+    Abre o arquivo de log em modo texto com um buffer de LOG_BUFFER_SIZE bytes.
+    Arquivos .gz são comprimidos com gzip e .xz/.lzma com lzma.
+    """
+    # Níveis escolhidos pela vazão: o texto do log é muito repetitivo e comprime bem
+    # mesmo nos níveis rápidos (lzma com preset 1 fica menor e ~15x mais rápido que o 6)
+    if filepath.endswith(".gz"):
+        raw = gzip.open(filepath, "wb", compresslevel=6)
+    elif filepath.endswith((".xz", ".lzma")):
+        raw = lzma.open(filepath, "wb", preset=1)
+    else:
+        return open(filepath, "w", encoding="utf-8", buffering=LOG_BUFFER_SIZE)
+    return io.TextIOWrapper(io.BufferedWriter(raw, LOG_BUFFER_SIZE), encoding="utf-8")
+
+
+def open_log_source(filepath: str):
+    """Abre para leitura, em modo texto, um log gravado por open_log_stream (descomprimindo)."""
+    if filepath.endswith(".gz"):
+        return gzip.open(filepath, "rt", encoding="utf-8")
+    if filepath.endswith((".xz", ".lzma")):
+        return lzma.open(filepath, "rt", encoding="utf-8")
+    return open(filepath, "r", encoding="utf-8")
+
+
+class CycleLog:
+    """
+    Log de um ciclo com os valores crus. As mudanças são tuplas de inteiros e os textos
+    do log são propriedades calculadas na leitura. Também aceita o acesso por chave dos
+    antigos dicionários (log["ir_hex"], log["registers_changed"], ...).
+    """
+
+    __slots__ = ("cycle", "stage", "pc_before", "pc_after", "ir",
+                 "reg_changes", "flag_changes", "mem_changes")
+
+    def __init__(self, cycle: int, stage: str, pc_before: int, pc_after: int, ir: int,
+                 reg_changes=(), flag_changes=(), mem_changes=()):
+        self.cycle = cycle
+        self.stage = stage
+        self.pc_before = pc_before
+        self.pc_after = pc_after
+        self.ir = ir
+        self.reg_changes = reg_changes      # (registrador, antes, depois)
+        self.flag_changes = flag_changes    # (índice em FLAG_NAMES, antes, depois)
+        self.mem_changes = mem_changes      # (endereço, antes, depois)
+
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CycleLog):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    @property
+    def ir_binary(self) -> str:
+        return f"{self.ir:032b}"
+
+    @property
+    def ir_hex(self) -> str:
+        return f"0x{self.ir:08X}"
+
+    @property
+    def instruction(self) -> str:
+        return describe_instruction(self.ir)
+
+    @property
+    def registers_changed(self) -> List[Dict]:
+        to_signed = MemoryLoader.uint32_to_signed
+        return [{"reg": f"R{reg}", "before": before, "after": after,
+                 "before_signed": to_signed(before), "after_signed": to_signed(after)}
+                for reg, before, after in self.reg_changes]
+
+    @property
+    def flags_changed(self) -> List[Dict]:
+        return [{"flag": FLAG_NAMES[i], "before": before, "after": after}
+                for i, before, after in self.flag_changes]
+
+    @property
+    def memory_changed(self) -> List[Dict]:
+        return [{"address": addr, "before": before, "after": after}
+                for addr, before, after in self.mem_changes]
+
 
 class StateLogger:
     """
@@ -14,47 +169,68 @@ class StateLogger:
     Compara o estado anterior com o estado atual e gera logs detalhados.
     """
     
-    def __init__(self, cpu_ref):
+    def __init__(self, cpu_ref, trace_size: Optional[int] = None):
         """
         Inicializa o logger com referência à CPU.
         
         Args:
             cpu_ref: Referência ao objeto CPU para acessar o estado
+            trace_size: Quantos ciclos guardar (None = todos). Com K, os logs ficam em um
+                        buffer circular de K posições e só os últimos K ciclos são mantidos
         """
+        if trace_size is not None and trace_size < 1:
+            raise ValueError(f"Tamanho do trace inválido: {trace_size}")
         self.cpu = cpu_ref
         self.cycle_count = 0
-        self.logs = []  # Lista de logs de cada ciclo
+        # Mapa de símbolos do programa (interpretador.MapaSimbolos). Quando definido,
+        # os PCs dos logs aparecem também pelo rótulo (ex.: "5 (loop+1)")
+        self.symbols = None
+        self.trace_size = trace_size
+        # Logs de cada ciclo: lista crescente ou, com trace_size, buffer circular pré-alocado
+        self._logs = [] if trace_size is None else [None] * trace_size
+        self._ring_pos = 0      # próxima posição a sobrescrever no buffer circular
+        self.logged = 0         # ciclos registrados desde a criação (inclusive os descartados)
+        # Arquivo do log em fluxo (None = logs só em memória), seu caminho e o valor de
+        # `logged` quando foi aberto
+        self.stream = None
+        self.stream_path: Optional[str] = None
+        self._stream_start = 0
+        # Linhas "IR:" e "Instrução:" já formatadas, por palavra de instrução
+        self._ir_text: Dict[int, str] = {}
         
         # Estado anterior (para comparação)
         self.prev_state = {
             "pc": 0,
             "ir": 0,
-            "regs": [0] * 32,
-            "flags": {"neg": 0, "zero": 0, "carry": 0, "overflow": 0},
+            "flags": (0, 0, 0, 0),  # (neg, zero, carry, overflow)
             "memory": {}  # Apenas posições modificadas
         }
-        
-        # Mapeamento de opcodes para nomes (para logs legíveis)
-        self.OPCODE_NAMES = {
-            1: "ADD", 2: "SUB", 3: "ZEROS", 4: "XOR", 5: "OR", 6: "NOT",
-            7: "AND", 8: "ASL", 9: "ASR", 10: "LSL", 11: "LSR", 12: "COPY",
-            14: "LCLH", 15: "LCLL", 16: "LOAD", 17: "STORE",
-            18: "JAL", 19: "JR", 20: "BEQ", 21: "BNE", 22: "J",
-            32: "MUL", 33: "DIV", 34: "MOD", 35: "INC", 
-            36: "DEC", 37: "MOVI", 38: "NOTBIT", 39: "NOP",
-            255: "HALT"
-        }
+        # Registradores escritos no ciclo atual -> valor antes da primeira escrita
+        self._reg_writes: Dict[int, int] = {}
+        # Endereços escritos por write_mem no ciclo atual (esvaziada a cada log_cycle)
+        self.dirty_addresses: List[int] = []
+        # O 1º ciclo após capture_initial_state compara todos os endereços modificados
+        self._full_scan = True
+        self.OPCODE_NAMES = OPCODE_NAMES
     
     def capture_initial_state(self):
         """Captura o estado inicial antes da primeira instrução."""
+        flags = self.cpu.state.flags
         self.prev_state["pc"] = self.cpu.state.pc
         self.prev_state["ir"] = self.cpu.state.ir
-        self.prev_state["regs"] = copy.deepcopy(self.cpu.state.regs)
-        self.prev_state["flags"] = copy.deepcopy(self.cpu.state.flags.as_dict())
+        self.prev_state["flags"] = (flags.neg, flags.zero, flags.carry, flags.overflow)
         self.prev_state["memory"] = {}
+        self._reg_writes.clear()
+        self.dirty_addresses.clear()
+        self._full_scan = True
         self.cycle_count = 0
+
+    def reg_written(self, reg: int, before: int):
+        """Gancho de escrita: o registrador `reg` (R1-R31) vai ser escrito e valia `before`."""
+        if reg not in self._reg_writes:
+            self._reg_writes[reg] = before
     
-    def log_cycle(self, stage: str = "COMPLETE"):
+    def log_cycle(self, stage: str = "COMPLETE") -> CycleLog:
         """
         Registra as mudanças de estado após um ciclo completo de instrução.
         
@@ -64,175 +240,205 @@ class StateLogger:
         self.cycle_count += 1
         
         # Estado atual
-        current_pc = self.cpu.state.pc
-        current_ir = self.cpu.state.ir
-        current_regs = self.cpu.state.regs
-        current_flags = self.cpu.state.flags.as_dict()
-        
-        # Decodifica a instrução para log legível
-        opcode = self.cpu.extract_field(current_ir, 24, 31)
-        instr_name = self.OPCODE_NAMES.get(opcode, f"UNKNOWN({opcode})")
-        
-        # Extrai campos da instrução
-        ra_idx = self.cpu.extract_field(current_ir, 16, 23)
-        rb_idx = self.cpu.extract_field(current_ir, 8, 15)
-        rc_idx = self.cpu.extract_field(current_ir, 0, 7)
-        const16 = self.cpu.extract_field(current_ir, 8, 23)
-        addr24 = self.cpu.extract_field(current_ir, 0, 23)
+        state = self.cpu.state
+        current_pc = state.pc
+        prev_state = self.prev_state
+        entry = CycleLog(self.cycle_count, stage, prev_state["pc"], current_pc, state.ir)
         
-        # Monta representação legível da instrução
-        instr_repr = self._format_instruction(instr_name, ra_idx, rb_idx, rc_idx, const16, addr24)
+        # Detecta mudanças em registradores (só os escritos neste ciclo)
+        reg_writes = self._reg_writes
+        if reg_writes:
+            current_regs = state.regs
+            entry.reg_changes = [(i, reg_writes[i], current_regs[i]) for i in sorted(reg_writes)
+                                 if current_regs[i] != reg_writes[i]]
+            reg_writes.clear()
         
-        # Detecta mudanças
-        changes = {
-            "cycle": self.cycle_count,
-            "stage": stage,
-            "pc_before": self.prev_state["pc"],
-            "pc_after": current_pc,
-            "ir_binary": f"{current_ir:032b}",
-            "ir_hex": f"0x{current_ir:08X}",
-            "instruction": instr_repr,
-            "registers_changed": [],
-            "flags_changed": [],
-            "memory_changed": []
-        }
-        
-        # Detecta mudanças em registradores
-        for i in range(32):
-            if current_regs[i] != self.prev_state["regs"][i]:
-                changes["registers_changed"].append({
-                    "reg": f"R{i}",
-                    "before": self.prev_state["regs"][i],
-                    "after": current_regs[i],
-                    "before_signed": self.cpu.uint32_to_signed(self.prev_state["regs"][i]),
-                    "after_signed": self.cpu.uint32_to_signed(current_regs[i])
-                })
+        # Detecta mudanças em flags (só mudam quando a ALU deixou uma operação pendente)
+        if state.alu_pending is not None:
+            flags = state.flags
+            current_flags = (flags.neg, flags.zero, flags.carry, flags.overflow)
+            prev_flags = prev_state["flags"]
+            if current_flags != prev_flags:
+                entry.flag_changes = [(i, prev_flags[i], current_flags[i]) for i in range(4)
+                                      if current_flags[i] != prev_flags[i]]
+                prev_state["flags"] = current_flags
         
-        # Detecta mudanças em flags
-        for flag_name in ["neg", "zero", "carry", "overflow"]:
-            if current_flags[flag_name] != self.prev_state["flags"][flag_name]:
-                changes["flags_changed"].append({
-                    "flag": flag_name,
-                    "before": self.prev_state["flags"][flag_name],
-                    "after": current_flags[flag_name]
-                })
-        
-        # Detecta mudanças na memória
-        for addr in self.cpu._modified_addresses:
-            if addr not in self.prev_state["memory"] or \
-               self.cpu.memory[addr] != self.prev_state["memory"].get(addr, 0):
-                changes["memory_changed"].append({
-                    "address": addr,
-                    "before": self.prev_state["memory"].get(addr, 0),
-                    "after": self.cpu.memory[addr]
-                })
-                self.prev_state["memory"][addr] = self.cpu.memory[addr]
+        # Detecta mudanças na memória: no 1º ciclo, todos os endereços já modificados
+        # (inclusive o programa carregado); depois, só os escritos neste ciclo
+        if self._full_scan:
+            self._full_scan = False
+            addresses = self.cpu._modified_addresses
+        else:
+            addresses = self.dirty_addresses
+        if addresses:
+            memory = self.cpu.memory
+            logged = prev_state["memory"]
+            mem_changes = []
+            for addr in addresses:
+                value = memory[addr]
+                if addr not in logged or value != logged[addr]:
+                    mem_changes.append((addr, logged.get(addr, 0), value))
+                    logged[addr] = value
+            if mem_changes:
+                entry.mem_changes = mem_changes
+            self.dirty_addresses.clear()
         
         # Atualiza estado anterior
-        self.prev_state["pc"] = current_pc
-        self.prev_state["ir"] = current_ir
-        self.prev_state["regs"] = copy.deepcopy(current_regs)
-        self.prev_state["flags"] = copy.deepcopy(current_flags)
+        prev_state["pc"] = current_pc
+        prev_state["ir"] = entry.ir
         
-        # Adiciona log à lista
-        self.logs.append(changes)
+        # Em fluxo, o ciclo vai direto para o arquivo (e só fica em memória no buffer circular)
+        if self.stream is not None:
+            self.write_entry(self.stream, entry)
         
-        return changes
+        # Adiciona log à lista (no buffer circular, sobrescreve o ciclo mais antigo)
+        if self.trace_size is not None:
+            self._logs[self._ring_pos] = entry
+            self._ring_pos = (self._ring_pos + 1) % self.trace_size
+        elif self.stream is None:
+            self._logs.append(entry)
+        self.logged += 1
+        
+        return entry
+
+    @property
+    def logs(self) -> List[CycleLog]:
+        """Logs guardados, do ciclo mais antigo ao mais recente."""
+        if self.trace_size is None:
+            return self._logs
+        if self.logged < self.trace_size:
+            return self._logs[:self.logged]
+        return self._logs[self._ring_pos:] + self._logs[:self._ring_pos]
+
+    @property
+    def streamed_only(self) -> bool:
+        """Verdadeiro se os ciclos foram só para o arquivo em fluxo (sem buffer circular)."""
+        return self.stream_path is not None and self.trace_size is None
+
+    @property
+    def streamed(self) -> int:
+        """Ciclos escritos no arquivo em fluxo atual (ou no último aberto)."""
+        return self.logged - self._stream_start if self.stream_path is not None else 0
+
+    @property
+    def dropped(self) -> int:
+        """Ciclos registrados que já saíram do buffer circular."""
+        if self.trace_size is None:
+            return 0
+        return max(0, self.logged - self.trace_size)
     
+    def describe_instruction(self, ir: int) -> str:
+        """Decodifica a palavra da instrução para a forma legível do log."""
+        return describe_instruction(ir)
+
     def _format_instruction(self, name: str, ra: int, rb: int, rc: int, const16: int, addr24: int) -> str:
         """Formata a instrução de forma legível."""
-        if name == "HALT":
-            return "HALT"
-        elif name == "NOP":
-            return "NOP"
-        elif name in ["ADD", "SUB", "XOR", "OR", "AND", "ASL", "ASR", "LSL", "LSR", "MUL", "DIV", "MOD", "NOTBIT"]:
-            return f"{name} R{rc}, R{ra}, R{rb}"
-        elif name in ["NOT", "COPY", "INC", "DEC"]:
-            return f"{name} R{rc}, R{ra}"
-        elif name in ["ZEROS", "JR"]:
-            return f"{name} R{rc}"
-        elif name in ["LCLH", "LCLL", "MOVI"]:
-            return f"{name} R{rc}, {const16}"
-        elif name in ["LOAD", "STORE"]:
-            return f"{name} R{rc}, R{ra}"
-        elif name in ["BEQ", "BNE"]:
-            return f"{name} R{ra}, R{rb}, {rc}"
-        elif name in ["J", "JAL"]:
-            return f"{name} {addr24}"
-        else:
-            return f"{name} (opcode desconhecido)"
+        return format_instruction(name, ra, rb, rc, const16, addr24)
     
-    def print_cycle_log(self, cycle_data: Dict):
+    def _pc_label(self, pc: int) -> str:
+        """Rótulo do endereço entre parênteses (vazio sem mapa de símbolos ou sem rótulo)."""
+        if self.symbols is None:
+            return ""
+        rotulo = self.symbols.rotulo(pc)
+        return f" ({rotulo})" if rotulo else ""
+
+    def print_cycle_log(self, cycle_data: CycleLog):
         """Imprime o log de um ciclo de forma formatada."""
-        print(f"\n{'='*80}")
-        print(f"CICLO {cycle_data['cycle']} - Estágio: {cycle_data['stage']}")
-        print(f"{'='*80}")
-        print(f"PC: {cycle_data['pc_before']} → {cycle_data['pc_after']}")
-        print(f"IR: {cycle_data['ir_hex']} ({cycle_data['ir_binary']})")
-        print(f"Instrução: {cycle_data['instruction']}")
-        
-        if cycle_data['registers_changed']:
-            print(f"\n--- Registradores Modificados ---")
-            for reg_change in cycle_data['registers_changed']:
-                print(f"  {reg_change['reg']}: {reg_change['before']} → {reg_change['after']} "
-                      f"(signed: {reg_change['before_signed']} → {reg_change['after_signed']})")
-        
-        if cycle_data['flags_changed']:
-            print(f"\n--- Flags Modificados ---")
-            for flag_change in cycle_data['flags_changed']:
-                print(f"  {flag_change['flag']}: {flag_change['before']} → {flag_change['after']}")
-        
-        if cycle_data['memory_changed']:
-            print(f"\n--- Memória Modificada ---")
-            for mem_change in cycle_data['memory_changed']:
-                print(f"  MEM[{mem_change['address']}]: {mem_change['before']} → {mem_change['after']}")
-        
-        if not cycle_data['registers_changed'] and not cycle_data['flags_changed'] and not cycle_data['memory_changed']:
-            print("\n(Nenhuma mudança de estado detectada)")
+        self.write_entry(sys.stdout, cycle_data)
     
     def save_logs_to_file(self, filepath: str):
-        """Salva todos os logs em um arquivo texto."""
+        """
+        Salva todos os logs em um arquivo texto. Em fluxo (sem buffer circular) os ciclos
+        não estão em memória: o arquivo do fluxo é copiado (e descomprimido) para `filepath`.
+        """
+        if self.streamed_only:
+            if self.stream is not None:
+                raise ValueError(f"Log em fluxo ainda aberto em: {self.stream_path}")
+            if os.path.abspath(filepath) != os.path.abspath(self.stream_path):
+                with open_log_source(self.stream_path) as src, \
+                        open(filepath, 'w', encoding='utf-8') as f:
+                    shutil.copyfileobj(src, f, LOG_BUFFER_SIZE)
+            return
         with open(filepath, 'w', encoding='utf-8') as f:
-            f.write("="*80 + "\n")
-            f.write("LOG DE EXECUÇÃO DO SIMULADOR UFLA-RISC\n")
-            f.write("="*80 + "\n\n")
+            self.write_header(f)
+            if self.dropped:
+                f.write(f"(Últimos {self.trace_size} ciclos; {self.dropped} ciclos anteriores descartados)\n")
             
             for log_entry in self.logs:
-                f.write(f"\n{'='*80}\n")
-                f.write(f"CICLO {log_entry['cycle']} - Estágio: {log_entry['stage']}\n")
-                f.write(f"{'='*80}\n")
-                f.write(f"PC: {log_entry['pc_before']} → {log_entry['pc_after']}\n")
-                f.write(f"IR: {log_entry['ir_hex']} ({log_entry['ir_binary']})\n")
-                f.write(f"Instrução: {log_entry['instruction']}\n")
-                
-                if log_entry['registers_changed']:
-                    f.write(f"\n--- Registradores Modificados ---\n")
-                    for reg_change in log_entry['registers_changed']:
-                        f.write(f"  {reg_change['reg']}: {reg_change['before']} → {reg_change['after']} "
-                              f"(signed: {reg_change['before_signed']} → {reg_change['after_signed']})\n")
-                
-                if log_entry['flags_changed']:
-                    f.write(f"\n--- Flags Modificados ---\n")
-                    for flag_change in log_entry['flags_changed']:
-                        f.write(f"  {flag_change['flag']}: {flag_change['before']} → {flag_change['after']}\n")
-                
-                if log_entry['memory_changed']:
-                    f.write(f"\n--- Memória Modificada ---\n")
-                    for mem_change in log_entry['memory_changed']:
-                        f.write(f"  MEM[{mem_change['address']}]: {mem_change['before']} → {mem_change['after']}\n")
-                
-                if not log_entry['registers_changed'] and not log_entry['flags_changed'] and not log_entry['memory_changed']:
-                    f.write("\n(Nenhuma mudança de estado detectada)\n")
+                self.write_entry(f, log_entry)
             
-            f.write(f"\n{'='*80}\n")
-            f.write(f"TOTAL DE CICLOS: {self.cycle_count}\n")
-            f.write(f"{'='*80}\n")
+            self.write_footer(f, self.cycle_count)
+
+    def start_stream(self, filepath: str):
+        """Passa a escrever cada ciclo em `filepath` à medida que é registrado (cabeçalho já escrito)."""
+        self.stop_stream()
+        self.stream = open_log_stream(filepath)
+        self.stream_path = filepath
+        self._stream_start = self.logged
+        self.write_header(self.stream)
+
+    def stop_stream(self):
+        """Escreve o rodapé, descarrega o buffer e fecha o arquivo do log em fluxo."""
+        if self.stream is not None:
+            try:
+                self.write_footer(self.stream, self.cycle_count)
+            finally:
+                self.stream.close()
+                self.stream = None
+
+    def write_header(self, f):
+        """Escreve o cabeçalho do arquivo de log."""
+        f.write("="*80 + "\n")
+        f.write("LOG DE EXECUÇÃO DO SIMULADOR UFLA-RISC\n")
+        f.write("="*80 + "\n\n")
+
+    def write_entry(self, f, log_entry: CycleLog):
+        """Escreve o bloco de texto de um ciclo; é aqui que os campos crus viram texto."""
+        to_signed = MemoryLoader.uint32_to_signed
+        ir = log_entry.ir
+        ir_text = self._ir_text.get(ir)
+        if ir_text is None:
+            ir_text = self._ir_text[ir] = f"IR: 0x{ir:08X} ({ir:032b})\nInstrução: {describe_instruction(ir)}\n"
+        lines = [
+            f"\n{'='*80}\n",
+            f"CICLO {log_entry.cycle} - Estágio: {log_entry.stage}\n",
+            f"{'='*80}\n",
+            f"PC: {log_entry.pc_before}{self._pc_label(log_entry.pc_before)} → "
+            f"{log_entry.pc_after}{self._pc_label(log_entry.pc_after)}\n",
+            ir_text,
+        ]
+        
+        if log_entry.reg_changes:
+            lines.append("\n--- Registradores Modificados ---\n")
+            for reg, before, after in log_entry.reg_changes:
+                lines.append(f"  R{reg}: {before} → {after} "
+                             f"(signed: {to_signed(before)} → {to_signed(after)})\n")
+        
+        if log_entry.flag_changes:
+            lines.append("\n--- Flags Modificados ---\n")
+            for i, before, after in log_entry.flag_changes:
+                lines.append(f"  {FLAG_NAMES[i]}: {before} → {after}\n")
+        
+        if log_entry.mem_changes:
+            lines.append("\n--- Memória Modificada ---\n")
+            for addr, before, after in log_entry.mem_changes:
+                lines.append(f"  MEM[{addr}]: {before} → {after}\n")
+        
+        if not log_entry.reg_changes and not log_entry.flag_changes and not log_entry.mem_changes:
+            lines.append("\n(Nenhuma mudança de estado detectada)\n")
+        f.write("".join(lines))
+
+    def write_footer(self, f, total_cycles: int):
+        """Escreve o rodapé do arquivo de log com o total de ciclos."""
+        f.write(f"\n{'='*80}\n")
+        f.write(f"TOTAL DE CICLOS: {total_cycles}\n")
+        f.write(f"{'='*80}\n")
     
     def get_summary(self) -> Dict:
         """Retorna um resumo da execução."""
         return {
             "total_cycles": self.cycle_count,
-            "total_logs": len(self.logs),
+            "total_logs": self.streamed if self.streamed_only else len(self.logs),
             "final_pc": self.cpu.state.pc,
             "final_flags": self.cpu.state.flags.as_dict()
         }
@@ -0,0 +1,137 @@
+"""
+Execução Paralela de Trabalhos (pool de processos)
+ - Cada trabalho é (programa, estado inicial, orçamento de ciclos); os trabalhos são
+   distribuídos em blocos (chunks) por um ProcessPoolExecutor
+ - As imagens dos programas são enviadas uma única vez para cada processo, no inicializador,
+   e não junto com cada trabalho
+ - Cada processo reaproveita uma CPU por programa: entre um trabalho e outro só as palavras
+   escritas voltam ao valor da imagem (os caches de decodificação continuam válidos)
+ - Os resultados voltam como registros compactos, na ordem dos trabalhos
+"""
+
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from cpu import CPU
+from events import NullSink
+from loader import MemoryLoader, CPUState, ADDRESS_BITS
+
+# Programa: caminho de um arquivo (.bin texto ou imagem binária) ou segmentos (endereço, palavras)
+Program = Union[str, Sequence[Tuple[int, Sequence[int]]]]
+
+
+@dataclass
+class Job:
+    """Um trabalho: qual programa rodar, a partir de qual estado e com qual orçamento."""
+    program: str                                # chave do dicionário de programas
+    regs: Optional[Sequence[int]] = None        # registradores iniciais (None = zerados)
+    memory: Optional[Dict[int, int]] = None     # palavras escritas por cima da imagem
+    pc: Optional[int] = None                    # None = PC de entrada do programa
+    max_cycles: Optional[int] = None            # None = sem limite
+    engine: str = "interp"
+
+
+@dataclass
+class JobResult:
+    """Registro compacto do fim de um trabalho."""
+    cycles: int
+    reason: str                         # STOP_* (como em RunResult)
+    pc: int
+    ir: int
+    regs: Tuple[int, ...]
+    flags: Tuple[int, int, int, int]    # (neg, zero, carry, overflow)
+    memory: Dict[int, int]              # endereços escritos pelo trabalho -> valor final
+
+
+def program_image(program: Program, address_bits: int = ADDRESS_BITS) -> Tuple[int, List[Tuple[int, array]]]:
+    """
+    Converte um programa em (PC de entrada, segmentos com palavras em array('I')),
+    o formato enviado aos processos. Arquivos são carregados (e validados) aqui mesmo.
+    """
+    loader = MemoryLoader("array", address_bits)
+    if isinstance(program, str):
+        loader.load_from_file(program)
+    else:
+        # Mesmo PC de entrada de CPU.load_program (o primeiro endereço carregado)
+        loader.load_program(program)
+    # Endereços carregados agrupados em trechos contíguos
+    segments = []
+    inicio = anterior = None
+    for address in sorted(loader._modified_addresses):
+        if inicio is not None and address != anterior + 1:
+            segments.append((inicio, loader.memory[inicio:anterior + 1]))
+            inicio = None
+        if inicio is None:
+            inicio = address
+        anterior = address
+    if inicio is not None:
+        segments.append((inicio, loader.memory[inicio:anterior + 1]))
+    return loader.state.pc, segments
+
+
+# ---------- lado do processo trabalhador ----------
+# Programas do processo: nome -> (CPU reaproveitada, PC de entrada, imagem original)
+_programas: Dict[str, tuple] = {}
+
+
+def _init_worker(images: Dict[str, Tuple[int, list]], address_bits: int):
+    """Inicializador do processo: monta uma CPU por programa com a imagem já carregada."""
+    _programas.clear()
+    for name, (entry_pc, segments) in images.items():
+        cpu = CPU(memory_backend="array", address_bits=address_bits, events=NullSink())
+        cpu.load_segments(segments)
+        cpu._modified_addresses.clear()
+        _programas[name] = (cpu, entry_pc, array('I', cpu.memory))
+
+
+def _run_job(job: Job) -> JobResult:
+    """Executa um trabalho na CPU do programa e a devolve ao estado da imagem."""
+    cpu, entry_pc, image = _programas[job.program]
+    state = CPUState()
+    if job.regs is not None:
+        state.regs = list(job.regs)
+    state.pc = entry_pc if job.pc is None else job.pc
+    cpu.state = state
+    if job.memory:
+        for address, value in job.memory.items():
+            cpu.write_mem(address, value)
+    try:
+        result = cpu.run(engine=job.engine, max_cycles=job.max_cycles)
+        flags = state.flags
+        touched = {address: cpu.memory[address] for address in sorted(cpu._modified_addresses)}
+        return JobResult(result.cycles, result.reason, result.pc, state.ir, tuple(state.regs),
+                         (flags.neg, flags.zero, flags.carry, flags.overflow), touched)
+    finally:
+        # Restaura só o que foi escrito (write_mem também descarta o código traduzido dali)
+        for address in list(cpu._modified_addresses):
+            cpu.write_mem(address, image[address])
+        cpu._modified_addresses.clear()
+
+
+# ---------- lado de quem distribui ----------
+def run_jobs(programs: Dict[str, Program], jobs: Iterable[Job], workers: Optional[int] = None,
+             chunksize: Optional[int] = None, address_bits: int = ADDRESS_BITS) -> Iterator[JobResult]:
+    """
+    Executa os trabalhos em paralelo e devolve os resultados, na ordem dos trabalhos,
+    à medida que ficam prontos.
+
+    Args:
+        programs: nome -> programa (caminho de arquivo ou segmentos)
+        jobs: Trabalhos; Job.program é uma chave de `programs`
+        workers: Número de processos (None = um por núcleo)
+        chunksize: Trabalhos por envio a um processo (None = ~4 blocos por processo)
+        address_bits: Largura do endereço das CPUs
+    """
+    jobs = list(jobs)
+    for job in jobs:
+        if job.program not in programs:
+            raise KeyError(f"Unknown program '{job.program}'.")
+    images = {name: program_image(program, address_bits) for name, program in programs.items()}
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(images, address_bits)) as executor:
+        yield from executor.map(_run_job, jobs, chunksize=chunksize)
@@ -1,13 +1,23 @@
 """
 Framework de Testes para o Simulador UFLA-RISC
  - Sistema automatizado para testar instruções isoladas e programas completos
+ - Os programas de teste são montados e carregados direto em memória; os arquivos
+   .asm/.bin são apenas artefatos para consulta (opcionais)
+ - No modo paralelo os testes são só registrados e executados juntos em processos
+   separados; resultados e saída de console são reunidos na ordem de registro
 """
 
+import io
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from typing import Dict, List, Tuple, Optional
+from cpu import CPU, STOP_BREAKPOINT
 from cpu_logged import CPULogged
-from interpretador import montar_instrucao
+from events import NullSink
+from jit import eh_laco
+from interpretador import CacheMontagem, montar_programa, escrever_bin
 
 class TestFramework:
     """
@@ -15,9 +25,38 @@ class TestFramework:
     Suporta testes isolados (por instrução) e testes massivos (programas completos).
     """
     
-    def __init__(self, output_dir: str = "../testes"):
+    def __init__(self, output_dir: str = "../testes", engines: Tuple[str, ...] = ("threaded", "jit"),
+                 max_cycles: Optional[int] = 5001, parallel: bool = False,
+                 workers: Optional[int] = None, save_logs: bool = True, save_files: bool = True,
+                 cache_dir: Optional[str] = None):
+        """
+        Args:
+            output_dir: Diretório dos arquivos .asm, .bin, logs e relatório
+            engines: Motores de execução da CPU conferidos contra o interpretador em cada teste
+            max_cycles: Orçamento de ciclos de cada execução (protege contra laços infinitos;
+                        o padrão mantém o antigo limite fixo do run(), que parava após 5001 ciclos)
+            parallel: Se True, run_test só registra o teste; run_pending (chamado também por
+                      generate_report) executa todos em um pool de processos
+            workers: Número de processos do modo paralelo (None = um por núcleo)
+            save_logs: Se False, nenhum teste grava o arquivo _log.txt (mais rápido)
+            save_files: Se False, create_test_program não grava os arquivos .asm e .bin
+                        (o programa montado fica só em memória)
+            cache_dir: Pasta do cache de montagem (fontes que não mudaram não são montados
+                       de novo); None desativa o cache
+        """
         self.output_dir = output_dir
+        self.engines = engines
+        self.max_cycles = max_cycles
+        self.parallel = parallel
+        self.workers = workers
+        self.save_logs = save_logs
+        self.save_files = save_files
         self.test_results = []
+        # Programas montados em memória: caminho do .bin -> segmentos (endereço, palavras)
+        self.programs: Dict[str, list] = {}
+        self.cache = CacheMontagem(cache_dir) if cache_dir else None
+        # Testes registrados e ainda não executados (modo paralelo)
+        self.pending: List[Tuple[str, str, Dict, bool, Optional[list]]] = []
         
     def create_test_program(self, name: str, assembly_code: List[str], 
                            expected_results: Dict, description: str = "") -> str:
@@ -31,29 +70,34 @@ class TestFramework:
             description: Descrição do teste
             
         Returns:
-            Caminho do arquivo binário gerado
+            Caminho do arquivo binário gerado (também a chave do programa em self.programs)
         """
-        # Cria arquivo assembly
         asm_path = os.path.join(self.output_dir, f"{name}.asm")
         bin_path = os.path.join(self.output_dir, f"{name}.bin")
-        
-        with open(asm_path, 'w', encoding='utf-8') as f:
-            f.write(f"# Teste: {name}\n")
-            f.write(f"# Descrição: {description}\n")
-            f.write("address 0\n")
-            for line in assembly_code:
-                f.write(line + "\n")
-        
-        # Converte para binário
-        with open(asm_path, 'r', encoding='utf-8') as fin, \
-             open(bin_path, 'w', encoding='utf-8') as fout:
-            for linha in fin:
-                b = montar_instrucao(linha)
-                if b:
-                    fout.write(b + "\n")
-        
+        linhas = [f"# Teste: {name}", f"# Descrição: {description}", "address 0"] + list(assembly_code)
+
+        # Monta direto em memória; run_test carrega os segmentos sem reler arquivos
+        programa = self.cache.montar(linhas) if self.cache else montar_programa(linhas)
+        self.programs[bin_path] = programa.segmentos
+
+        if self.save_files:
+            with open(asm_path, 'w', encoding='utf-8') as f:
+                for line in linhas:
+                    f.write(line + "\n")
+            # O texto do .bin só é gerado aqui, na gravação
+            with open(bin_path, 'w', encoding='utf-8') as fout:
+                escrever_bin(self.programs[bin_path], fout)
+
         return bin_path
-    
+
+    def _load(self, cpu, bin_path: str):
+        """Carrega o programa do teste: da memória, se foi montado aqui, ou do arquivo."""
+        program = self.programs.get(bin_path)
+        if program is None:
+            cpu.load_from_file(bin_path, verbose=False)
+        else:
+            cpu.load_program(program)
+
     def run_test(self, name: str, bin_path: str, expected_results: Dict, 
                  save_log: bool = True) -> Dict:
         """
@@ -66,21 +110,26 @@ class TestFramework:
             save_log: Se True, salva o log de execução
             
         Returns:
-            Dicionário com resultado do teste (passed, errors, details)
+            Dicionário com resultado do teste (passed, errors, details), ou None no modo
+            paralelo (o resultado só existe depois de run_pending)
         """
+        if self.parallel:
+            self.pending.append((name, bin_path, expected_results, save_log, self.programs.get(bin_path)))
+            return None
+
         print(f"\n{'='*80}")
         print(f"Executando Teste: {name}")
         print(f"{'='*80}")
         
         # Cria CPU e executa
-        cpu = CPULogged(enable_logging=True, verbose=False)
+        cpu = CPULogged(enable_logging=True, verbose=False, memory_backend="array")
         
         try:
-            cpu.load_from_file(bin_path, verbose=False)
-            cpu.run()
+            self._load(cpu, bin_path)
+            run_result = cpu.run(max_cycles=self.max_cycles)
             
             # Salva log se solicitado
-            if save_log:
+            if save_log and self.save_logs:
                 log_path = os.path.join(self.output_dir, f"{name}_log.txt")
                 cpu.save_execution_log(log_path)
             
@@ -120,6 +169,9 @@ class TestFramework:
                     errors.append(
                         f"PC final: esperado {expected_results['pc']}, obtido {cpu.state.pc}"
                     )
+
+            # Confere os outros motores de execução contra o interpretador
+            errors.extend(self.compare_engines(bin_path, cpu, run_result))
             
             # Resultado do teste
             passed = len(errors) == 0
@@ -159,8 +211,88 @@ class TestFramework:
             self.test_results.append(result)
             return result
     
+    def run_pending(self) -> List[Dict]:
+        """
+        Executa em paralelo os testes registrados no modo paralelo. A saída de console
+        de cada teste é capturada no processo e impressa aqui, na ordem de registro,
+        e os resultados entram em self.test_results nessa mesma ordem.
+        """
+        pending, self.pending = self.pending, []
+        if not pending:
+            return []
+        config = (self.output_dir, self.engines, self.max_cycles, self.save_logs)
+        results = []
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for result, output in executor.map(_run_test_worker, [config] * len(pending), pending):
+                sys.stdout.write(output)
+                self.test_results.append(result)
+                results.append(result)
+        return results
+
+    @staticmethod
+    def _snapshot(cpu) -> Dict:
+        """Estado completo da CPU (para comparação exata entre motores)."""
+        return {
+            "pc": cpu.state.pc,
+            "ir": cpu.state.ir,
+            "halted": cpu.state.halted,
+            "flags": cpu.state.flags.as_dict(),
+            "registers": list(cpu.state.regs),
+            "memory": list(cpu.memory),
+        }
+
+    def compare_engines(self, bin_path: str, reference, reference_result=None) -> List[str]:
+        """
+        Executa o mesmo binário em cada motor de self.engines e compara o estado
+        final (e, se dado, o RunResult) com o da CPU de referência (interpretador).
+        Retorna as divergências.
+        """
+        expected = self._snapshot(reference)
+        if reference_result is not None:
+            expected["result"] = (reference_result.cycles, reference_result.reason)
+        errors = []
+        loop_heads = set()
+        for engine in self.engines:
+            cpu = CPU(memory_backend="array", events=NullSink())
+            self._load(cpu, bin_path)
+            result = cpu.run(engine=engine, max_cycles=self.max_cycles)
+            actual = self._snapshot(cpu)
+            actual["result"] = (result.cycles, result.reason)
+            for key in expected:
+                if actual[key] != expected[key]:
+                    errors.append(f"Motor '{engine}' divergiu do interpretador em '{key}'")
+            loop_heads.update(b.inicio for b in cpu._blocks.values() if b is not None and eh_laco(b))
+
+        # Breakpoint no início de cada laço: as paradas devem ser as mesmas do interpretador
+        if loop_heads:
+            expected_stops = self._run_stops(bin_path, "interp", loop_heads)
+            for engine in self.engines:
+                if self._run_stops(bin_path, engine, loop_heads) != expected_stops:
+                    errors.append(f"Motor '{engine}' divergiu do interpretador com breakpoint no início de laço")
+        return errors
+
+    def _run_stops(self, bin_path: str, engine: str, breakpoints, max_stops: int = 64) -> List:
+        """Executa parando nos breakpoints (até max_stops vezes); retorna as paradas e o estado final."""
+        cpu = CPU(memory_backend="array", events=NullSink())
+        self._load(cpu, bin_path)
+        cpu.breakpoints = set(breakpoints)
+        stops = []
+        remaining = self.max_cycles
+        while True:
+            if len(stops) == max_stops:
+                cpu.breakpoints = set()
+            result = cpu.run(engine=engine, max_cycles=remaining)
+            stops.append((result.cycles, result.reason, result.pc))
+            if remaining is not None:
+                remaining -= result.cycles
+            if result.reason != STOP_BREAKPOINT or remaining == 0:
+                break
+        stops.append(self._snapshot(cpu))
+        return stops
+
     def generate_report(self, filepath: str):
-        """Gera relatório completo dos testes."""
+        """Gera relatório completo dos testes (executando antes os testes ainda pendentes)."""
+        self.run_pending()
         total = len(self.test_results)
         passed = sum(1 for r in self.test_results if r["passed"])
         failed = total - passed
@@ -173,7 +305,12 @@ class TestFramework:
             f.write(f"Total de Testes: {total}\n")
             f.write(f"Testes Aprovados: {passed}\n")
             f.write(f"Testes Falhados: {failed}\n")
-            f.write(f"Taxa de Sucesso: {(passed/total*100) if total > 0 else 0:.2f}%\n\n")
+            f.write(f"Taxa de Sucesso: {(passed/total*100) if total > 0 else 0:.2f}%\n")
+            if self.cache:
+                stats = self.cache.stats()
+                f.write(f"Cache de Montagem: {stats['hits']} acertos, {stats['misses']} faltas, "
+                        f"{stats['evictions']} descartes\n")
+            f.write("\n")
             
             f.write("="*80 + "\n")
             f.write("DETALHES DOS TESTES\n")
@@ -200,6 +337,22 @@ class TestFramework:
         
         print(f"\n Relatório de testes salvo em: {filepath}")
         print(f"Total: {total} | Passou: {passed} | Falhou: {failed}")
+        if self.cache:
+            stats = self.cache.stats()
+            print(f"Cache de montagem: {stats['hits']} acertos | {stats['misses']} faltas")
+
+
+def _run_test_worker(config: tuple, test: tuple) -> Tuple[Dict, str]:
+    """Executa um teste em um processo do pool; retorna o resultado e a saída de console."""
+    output_dir, engines, max_cycles, save_logs = config
+    name, bin_path, expected_results, save_log, program = test
+    framework = TestFramework(output_dir, engines, max_cycles, save_logs=save_logs)
+    if program is not None:
+        framework.programs[bin_path] = program
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        result = framework.run_test(name, bin_path, expected_results, save_log)
+    return result, buffer.getvalue()
 
 
 # -----------------------------------------------------------------------------
@@ -7,10 +7,13 @@ import sys
 import os
 from test_framework import TestFramework
 
-def run_all_isolated_tests():
+def run_all_isolated_tests(parallel: bool = False, save_logs: bool = True, save_files: bool = True,
+                           cache: bool = True):
     """Executa todos os testes isolados de instruções."""
     
-    framework = TestFramework(output_dir="../testes/isolados")
+    framework = TestFramework(output_dir="../testes/isolados", parallel=parallel, save_logs=save_logs,
+                              save_files=save_files,
+                              cache_dir="../testes/.cache_montagem" if cache else None)
     
     print("\n" + "="*80)
     print("EXECUTANDO TESTES ISOLADOS - TODAS AS INSTRUÇÕES")
@@ -501,4 +504,8 @@ def run_all_isolated_tests():
 
 
 if __name__ == "__main__":
-    run_all_isolated_tests()
+    # --paralelo: executa os testes em processos separados; --sem-logs: não grava os _log.txt;
+    # --sem-arquivos: não grava os .asm/.bin (os programas são montados em memória);
+    # --sem-cache: monta todos os programas de novo, sem o cache de montagem
+    run_all_isolated_tests(parallel="--paralelo" in sys.argv, save_logs="--sem-logs" not in sys.argv,
+         save_files="--sem-arquivos" not in sys.argv, cache="--sem-cache" not in sys.argv)
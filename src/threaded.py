@@ -0,0 +1,307 @@
+"""
+Execução por Blocos Básicos (threaded code)
+ - Descobre blocos básicos (trechos lineares terminados em JAL/JR/BEQ/BNE/J/HALT)
+ - Traduz cada instrução do bloco uma única vez para uma closure especializada
+ - O bloco inteiro vira um único chamável, guardado em cache pelo PC de entrada
+"""
+
+from typing import Callable, Optional
+from events import EV_ERROR, EV_HALT
+from loader import WORD_MASK, ALU_LOGIC, ALU_ADD, ALU_SUB
+
+MAX_BLOCK_LEN = 64          # Tamanho máximo (em instruções) de um bloco traduzido
+HALT_WORD = 0xFFFFFFFF
+TERMINADORES = {18, 19, 20, 21, 22}     # JAL, JR, BEQ, BNE, J
+
+# Opcodes que escrevem em RC (só são traduzidos se RC for um registrador válido)
+ESCREVEM_RC = {1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 14, 15, 16, 32, 33, 34, 35, 36, 37, 38}
+
+
+def _signed(x: int) -> int:
+    """Interpreta uma palavra de 32 bits como inteiro com sinal (complemento de dois)."""
+    return x - 0x100000000 if x & 0x80000000 else x
+
+
+class Bloco:
+    """
+    Bloco básico já traduzido: intervalo de endereços [inicio, fim], as instruções
+    decodificadas que o compõem e o chamável que o executa.
+    """
+
+    __slots__ = ("inicio", "fim", "tamanho", "executar", "instrucoes", "terminado",
+                 "execucoes", "compilado")
+
+    def __init__(self, inicio: int, fim: int, executar: Callable[[], int],
+                 instrucoes: tuple = (), terminado: bool = False):
+        self.inicio = inicio
+        self.fim = fim
+        self.tamanho = fim - inicio + 1
+        self.executar = executar
+        # (endereco, palavra, opcode, ra, rb, rc, const16, addr24) de cada instrução
+        self.instrucoes = instrucoes
+        # True se a última instrução é JAL/JR/BEQ/BNE/J/HALT
+        self.terminado = terminado
+        # Contador de execuções e versão compilada (usados pelo motor "jit")
+        self.execucoes = 0
+        self.compilado = None
+
+
+# -----------------------------------------------------------------------------
+# Fábricas de closures (uma por opcode)
+# Cada operação recebe a lista de registradores e o CPUState e retorna True quando o bloco
+# precisa parar logo após ela (erro que parou a CPU ou escrita no próprio bloco).
+# -----------------------------------------------------------------------------
+
+def traduzivel(opcode: int, rc: int) -> bool:
+    """Indica se a instrução (não terminadora) tem uma closure especializada."""
+    if opcode in ESCREVEM_RC or opcode == 17:
+        # Escrita (ou leitura do endereço, no STORE) em registrador inexistente fica com o step
+        return rc < 32
+    return opcode == 39
+
+
+def _traduzir_operacao(cpu, endereco, opcode, ra, rb, rc, const16, inicio, fim) -> Callable:
+    """Cria a closure especializada de uma instrução não terminadora já validada por traduzivel()."""
+    # Índices fora do banco são lidos como 0 (mesma regra do step)
+    ra = ra if ra < 32 else 0
+    rb = rb if rb < 32 else 0
+    M = WORD_MASK
+    ZERO_FLAGS = (0, ALU_LOGIC, 0, 0)
+
+    if opcode == 1: # ADD
+        def op(regs, state):
+            va = regs[ra] if ra else 0
+            vb = regs[rb] if rb else 0
+            res = va + vb
+            if rc:
+                regs[rc] = res & M
+            state.alu_pending = (res, ALU_ADD, va, vb)
+    elif opcode == 2: # SUB
+        def op(regs, state):
+            va = regs[ra] if ra else 0
+            vb = regs[rb] if rb else 0
+            res = va - vb
+            if rc:
+                regs[rc] = res & M
+            state.alu_pending = (res, ALU_SUB, va, vb)
+    elif opcode == 3: # ZEROS
+        def op(regs, state):
+            if rc:
+                regs[rc] = 0
+            state.alu_pending = ZERO_FLAGS
+    elif opcode in (4, 5, 7, 8, 10, 11, 32, 38):
+        calc = {
+            4: lambda va, vb: va ^ vb,                      # XOR
+            5: lambda va, vb: va | vb,                      # OR
+            7: lambda va, vb: va & vb,                      # AND
+            8: lambda va, vb: va << (vb & 0x1F),            # ASL
+            10: lambda va, vb: va << (vb & 0x1F),           # LSL
+            11: lambda va, vb: va >> (vb & 0x1F),           # LSR
+            32: lambda va, vb: _signed(va) * _signed(vb),   # MUL
+            38: lambda va, vb: ~(va & vb),                  # NOTBIT
+        }[opcode]
+        if opcode == 38: # NOTBIT não altera flags
+            def op(regs, state):
+                res = calc(regs[ra] if ra else 0, regs[rb] if rb else 0)
+                if rc:
+                    regs[rc] = res & M
+        else:
+            def op(regs, state):
+                res = calc(regs[ra] if ra else 0, regs[rb] if rb else 0)
+                if rc:
+                    regs[rc] = res & M
+                state.alu_pending = (res, ALU_LOGIC, 0, 0)
+    elif opcode == 6: # NOT
+        def op(regs, state):
+            res = ~(regs[ra] if ra else 0)
+            if rc:
+                regs[rc] = res & M
+            state.alu_pending = (res, ALU_LOGIC, 0, 0)
+    elif opcode == 9: # ASR
+        def op(regs, state):
+            res = _signed(regs[ra] if ra else 0) >> ((regs[rb] if rb else 0) & 0x1F)
+            if rc:
+                regs[rc] = res & M
+            state.alu_pending = (res, ALU_LOGIC, 0, 0)
+    elif opcode == 12: # COPY
+        def op(regs, state):
+            res = regs[ra] if ra else 0
+            if rc:
+                regs[rc] = res
+            state.alu_pending = (res, ALU_LOGIC, 0, 0)
+    elif opcode == 14: # LCLH
+        alto = const16 << 16
+        def op(regs, state):
+            if rc:
+                regs[rc] = (alto | (regs[rc] & 0x0000FFFF)) & M
+    elif opcode == 15: # LCLL
+        def op(regs, state):
+            if rc:
+                regs[rc] = ((regs[rc] & 0xFFFF0000) | const16) & M
+    elif opcode == 16: # LOAD
+        mem = cpu.memory
+        tamanho = cpu.memory_size
+        def op(regs, state):
+            addr = regs[ra] if ra else 0
+            if addr < tamanho:
+                if rc:
+                    regs[rc] = mem[addr]
+                return False
+            cpu.events.emit(EV_ERROR, endereco, f"Erro: Tentativa de leitura em endereço inválido {addr}")
+            state.halted = True
+            return True
+    elif opcode == 17: # STORE
+        write_mem = cpu.write_mem
+        def op(regs, state):
+            addr = regs[rc] if rc else 0
+            try:
+                write_mem(addr, regs[ra] if ra else 0)
+            except IndexError:
+                cpu.events.emit(EV_ERROR, endereco, f"Erro: Tentativa de escrita em endereço inválido {addr}")
+                state.halted = True
+                return True
+            # Escrita dentro do próprio bloco: a tradução ficou velha, sai do bloco
+            return inicio <= addr <= fim
+    elif opcode in (33, 34): # DIV / MOD
+        nome = "" if opcode == 33 else " (MOD)"
+        def op(regs, state):
+            sa = _signed(regs[ra] if ra else 0)
+            sb = _signed(regs[rb] if rb else 0)
+            if sb == 0:
+                cpu.events.emit(EV_ERROR, endereco, f"Erro: Divisão por zero{nome} em PC={endereco}")
+                state.halted = True
+                return True
+            if opcode == 33:
+                res = int(sa / sb)
+                if rc:
+                    regs[rc] = res & M
+                state.alu_pending = (res, ALU_LOGIC, 0, 0)
+            elif rc:
+                regs[rc] = (sa % sb) & M
+    elif opcode == 35: # INC
+        def op(regs, state):
+            res = _signed(regs[ra] if ra else 0) + 1
+            if rc:
+                regs[rc] = res & M
+            state.alu_pending = (res, ALU_LOGIC, 0, 0)
+    elif opcode == 36: # DEC
+        def op(regs, state):
+            res = _signed(regs[ra] if ra else 0) - 1
+            if rc:
+                regs[rc] = res & M
+            state.alu_pending = (res, ALU_LOGIC, 0, 0)
+    elif opcode == 37: # MOVI
+        def op(regs, state):
+            if rc:
+                regs[rc] = const16
+    else: # NOP
+        def op(regs, state):
+            pass
+    return op
+
+
+def _traduzir_terminador(cpu, endereco, opcode, ra, rb, rc, addr24) -> Callable:
+    """
+    Cria a closure da instrução que encerra o bloco. Ela define o novo PC
+    (o PC já vale endereco + 1 quando é chamada, como no step).
+    """
+    ra = ra if ra < 32 else 0
+    rb = rb if rb < 32 else 0
+    proximo = endereco + 1
+    set_pc = cpu.set_pc
+
+    if opcode == 18: # JAL
+        def term(regs, state):
+            regs[31] = proximo
+            set_pc(addr24)
+    elif opcode == 19: # JR
+        def term(regs, state):
+            set_pc(regs[rc] if rc else 0)
+    elif opcode == 20: # BEQ (rc < 256 é sempre um endereço válido)
+        def term(regs, state):
+            if (regs[ra] if ra else 0) == (regs[rb] if rb else 0):
+                state.pc = rc
+    elif opcode == 21: # BNE
+        def term(regs, state):
+            if (regs[ra] if ra else 0) != (regs[rb] if rb else 0):
+                state.pc = rc
+    elif opcode == 22: # J
+        def term(regs, state):
+            set_pc(addr24)
+    else: # HALT
+        def term(regs, state):
+            state.halted = True
+            cpu.events.emit(EV_HALT, endereco, f"PC({endereco}): HALT encontrado.")
+    return term
+
+
+def traduzir_bloco(cpu, inicio: int) -> Optional[Bloco]:
+    """
+    Descobre o bloco básico que começa em `inicio` e o traduz para um único chamável.
+    Retorna None quando a primeira instrução não pode ser traduzida (o step a executa).
+    """
+    decoded_cache = cpu._decoded
+    memory_size = cpu.memory_size
+    itens = []
+    terminador = None
+    endereco = inicio
+    # O último endereço da memória fica sempre com o step (o incremento do PC falha ali)
+    while len(itens) < MAX_BLOCK_LEN and endereco + 1 < memory_size:
+        decoded = decoded_cache.get(endereco)
+        if decoded is None:
+            decoded = cpu._decode(cpu.memory[endereco])
+            decoded_cache[endereco] = decoded
+        palavra, handler, ra, rb, rc, const16, addr24 = decoded
+        opcode = palavra >> 24
+        if palavra == HALT_WORD or opcode in TERMINADORES:
+            # JR precisa ler RC; BEQ/BNE saltam para RC (tem que caber na memória)
+            if opcode == 19 and rc >= 32:
+                break
+            if opcode in (20, 21) and rc >= memory_size:
+                break
+            terminador = (endereco, palavra, opcode, ra, rb, rc, const16, addr24)
+            break
+        if handler is None or not traduzivel(opcode, rc):
+            break
+        itens.append((endereco, palavra, opcode, ra, rb, rc, const16, addr24))
+        endereco += 1
+
+    if not itens and terminador is None:
+        return None
+
+    fim = terminador[0] if terminador else itens[-1][0]
+    corpo = tuple(_traduzir_operacao(cpu, e, op, ra, rb, rc, c16, inicio, fim)
+                  for e, _, op, ra, rb, rc, c16, _ in itens)
+    palavras = [p for _, p, *_ in itens]
+    n_corpo = len(corpo)
+
+    if terminador is not None:
+        t_end, t_palavra, t_op, t_ra, t_rb, t_rc, _, t_addr24 = terminador
+        term = _traduzir_terminador(cpu, t_end, t_op, t_ra, t_rb, t_rc, t_addr24)
+        ultima_palavra = t_palavra
+        total = n_corpo + 1
+    else:
+        term = None
+        ultima_palavra = palavras[-1]
+        total = n_corpo
+    proximo_pc = fim + 1
+
+    def executar() -> int:
+        state = cpu.state
+        regs = state.regs
+        i = 0
+        for op in corpo:
+            if op(regs, state):
+                # Parada no meio do bloco: PC e IR ficam como o step deixaria
+                state.ir = palavras[i]
+                state.pc = inicio + i + 1
+                return i + 1
+            i += 1
+        state.ir = ultima_palavra
+        state.pc = proximo_pc
+        if term is not None:
+            term(regs, state)
+        return total
+
+    instrucoes = tuple(itens) + ((terminador,) if terminador else ())
+    return Bloco(inicio, fim, executar, instrucoes, terminador is not None)
@@ -0,0 +1,259 @@
+"""
+Trace Binário de Execução
+ - TraceWriter grava um registro de tamanho fixo por ciclo (ciclo, PC, IR, escrita em
+   registrador, escrita na memória, flags) direto em arquivo, à medida que a CPU executa
+ - TraceReader lê o arquivo depois da execução; render_text reproduz o texto de
+   StateLogger.save_logs_to_file e pode filtrar por faixa de PC, registradores ou endereços
+ - Uso: python tracefile.py execucao.trace [--pc A:B] [--reg N ...] [--addr A:B] [--sym programa.sym]
+
+Formato do arquivo (little-endian):
+ - Cabeçalho: assinatura, versão, PC inicial, flags iniciais e os 32 registradores iniciais
+ - Prelúdio (junto com o 1º ciclo): quantidade + pares (endereço, valor) dos endereços já
+   modificados antes da execução, que o log em texto mostra no 1º ciclo
+ - Registros de 28 bytes, um por ciclo. Os valores "antes" não são gravados: o leitor os
+   obtém reconstruindo o estado a partir do cabeçalho
+"""
+
+import struct
+import sys
+from typing import BinaryIO, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from loader import REG_COUNT
+from logger import CycleLog, StateLogger
+
+TRACE_MAGIC = b"URTRACE\0"
+TRACE_VERSION = 1
+# Cabeçalho: assinatura, versão, PC inicial, flags iniciais (bits neg, zero, carry, overflow)
+TRACE_HEADER = struct.Struct("<8sHIB")
+REGS_BLOCK = struct.Struct(f"<{REG_COUNT}I")
+COUNT = struct.Struct("<I")
+MEM_PAIR = struct.Struct("<II")
+# Registro de um ciclo: ciclo, PC depois, IR, registrador escrito (NO_REG = nenhum),
+# flags depois, 1 se houve escrita na memória, valor do registrador, endereço e valor escritos
+RECORD = struct.Struct("<IIIBBBxIII")
+NO_REG = 0xFF
+
+
+def _pack_flags(flags) -> int:
+    """Flags em 4 bits: neg, zero, carry, overflow (bit 0 a 3)."""
+    return flags.neg | (flags.zero << 1) | (flags.carry << 2) | (flags.overflow << 3)
+
+
+class TraceRecord(NamedTuple):
+    """Um ciclo do trace, como gravado (os valores "antes" vêm da reconstrução do estado)."""
+    cycle: int
+    pc: int             # PC depois do ciclo
+    ir: int
+    reg: int            # registrador escrito (NO_REG = nenhum)
+    flags: int          # flags depois do ciclo (bits neg, zero, carry, overflow)
+    mem_written: int
+    reg_value: int
+    mem_address: int
+    mem_value: int
+
+
+class TraceWriter:
+    """
+    Grava o trace binário de uma execução da CPULogged. Recebe as escritas pelos mesmos
+    ganchos do StateLogger (reg_written e dirty_addresses) e grava um registro por ciclo.
+    O conjunto de instruções faz no máximo uma escrita em registrador e uma na memória por
+    ciclo; o registro guarda a última de cada.
+    """
+
+    BUFFER_SIZE = 1 << 20   # bytes do buffer de escrita do arquivo
+
+    def __init__(self, cpu_ref, filepath: str):
+        """
+        Args:
+            cpu_ref: Referência à CPU cujo estado é gravado
+            filepath: Arquivo do trace (sobrescrito a cada execução)
+        """
+        self.cpu = cpu_ref
+        self.filepath = filepath
+        self.cycle_count = 0
+        self.dirty_addresses: List[int] = []   # endereços escritos no ciclo atual
+        self._file: Optional[BinaryIO] = None
+        self._reg = NO_REG
+
+    def reg_written(self, reg: int, before: int):
+        """Gancho de escrita: o registrador `reg` foi escrito neste ciclo."""
+        self._reg = reg
+
+    def capture_initial_state(self):
+        """Abre o arquivo e grava o cabeçalho com o estado antes da primeira instrução."""
+        self.close()
+        state = self.cpu.state
+        self._file = open(self.filepath, "wb", buffering=self.BUFFER_SIZE)
+        self._file.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, state.pc, _pack_flags(state.flags)))
+        self._file.write(REGS_BLOCK.pack(*state.regs))
+        self.dirty_addresses.clear()
+        self._reg = NO_REG
+        self.cycle_count = 0
+
+    def log_cycle(self):
+        """Grava o registro do ciclo que acabou de executar."""
+        self.cycle_count += 1
+        cpu = self.cpu
+        state = cpu.state
+        f = self._file
+        if self.cycle_count == 1:
+            # Prelúdio: endereços modificados até aqui (programa carregado e escritas do 1º ciclo)
+            memory = cpu.memory
+            addresses = cpu._modified_addresses
+            f.write(COUNT.pack(len(addresses)))
+            f.write(b"".join(MEM_PAIR.pack(addr, memory[addr]) for addr in addresses))
+            self.dirty_addresses.clear()
+        # Lidos todo ciclo: o StateLogger, se ativo, já calculou os flags pendentes
+        flags = state.flags
+        packed = flags.neg | (flags.zero << 1) | (flags.carry << 2) | (flags.overflow << 3)
+        reg = self._reg
+        if self.dirty_addresses:
+            addr = self.dirty_addresses[-1]
+            self.dirty_addresses.clear()
+            f.write(RECORD.pack(self.cycle_count, state.pc, state.ir, reg, packed, 1,
+                                state.regs[reg] if reg != NO_REG else 0, addr, cpu.memory[addr]))
+        else:
+            f.write(RECORD.pack(self.cycle_count, state.pc, state.ir, reg, packed, 0,
+                                state.regs[reg] if reg != NO_REG else 0, 0, 0))
+        self._reg = NO_REG
+
+    def close(self):
+        """Descarrega o buffer e fecha o arquivo (chamado no fim da execução, inclusive por erro)."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class TraceReader:
+    """Lê um trace binário gravado pelo TraceWriter."""
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        with open(filepath, "rb") as f:
+            magic, version, self.initial_pc, self.initial_flags = TRACE_HEADER.unpack(
+                f.read(TRACE_HEADER.size))
+            if magic != TRACE_MAGIC:
+                raise ValueError(f"Not a trace file: '{filepath}'")
+            if version != TRACE_VERSION:
+                raise ValueError(f"Unsupported trace version {version} in '{filepath}'")
+            self.initial_regs = list(REGS_BLOCK.unpack(f.read(REGS_BLOCK.size)))
+            # Prelúdio (ausente quando a execução não teve nenhum ciclo)
+            count = f.read(COUNT.size)
+            self.prelude: List[Tuple[int, int]] = []
+            if count:
+                n, = COUNT.unpack(count)
+                self.prelude = list(MEM_PAIR.iter_unpack(f.read(n * MEM_PAIR.size)))
+            self._records_offset = f.tell()
+            f.seek(0, 2)
+            self.cycles = (f.tell() - self._records_offset) // RECORD.size
+
+    def records(self) -> Iterator[TraceRecord]:
+        """Percorre os registros em ordem, lendo o arquivo em blocos."""
+        with open(self.filepath, "rb") as f:
+            f.seek(self._records_offset)
+            while True:
+                chunk = f.read(RECORD.size * 4096)
+                chunk = chunk[:len(chunk) - len(chunk) % RECORD.size]
+                if not chunk:
+                    return
+                for fields in RECORD.iter_unpack(chunk):
+                    yield TraceRecord(*fields)
+
+    def entries(self) -> Iterator[CycleLog]:
+        """
+        Reconstrói o estado ciclo a ciclo e produz as entradas de log de
+        StateLogger.log_cycle (mesmos campos e mesmas regras de mudança).
+        """
+        regs = list(self.initial_regs)
+        flags = self.initial_flags
+        memory = {}     # último valor mostrado de cada endereço (como prev_state["memory"])
+        pc = self.initial_pc
+        for rec in self.records():
+            entry = CycleLog(rec.cycle, "COMPLETE", pc, rec.pc, rec.ir)
+            if rec.reg != NO_REG and regs[rec.reg] != rec.reg_value:
+                entry.reg_changes = [(rec.reg, regs[rec.reg], rec.reg_value)]
+                regs[rec.reg] = rec.reg_value
+            if rec.flags != flags:
+                entry.flag_changes = [(bit, (flags >> bit) & 1, (rec.flags >> bit) & 1)
+                                      for bit in range(4) if ((flags ^ rec.flags) >> bit) & 1]
+                flags = rec.flags
+            writes = self.prelude if rec.cycle == 1 else \
+                ((rec.mem_address, rec.mem_value),) if rec.mem_written else ()
+            mem_changes = []
+            for addr, value in writes:
+                if addr not in memory or memory[addr] != value:
+                    mem_changes.append((addr, memory.get(addr, 0), value))
+                    memory[addr] = value
+            if mem_changes:
+                entry.mem_changes = mem_changes
+            pc = rec.pc
+            yield entry
+
+
+def _matches(entry: CycleLog, pc_range, regs, addr_range) -> bool:
+    """Indica se a entrada passa pelos filtros (todos os filtros dados precisam passar)."""
+    if pc_range is not None and not pc_range[0] <= entry.pc_before <= pc_range[1]:
+        return False
+    if regs is not None and not any(reg in regs for reg, _, _ in entry.reg_changes):
+        return False
+    if addr_range is not None and not any(addr_range[0] <= addr <= addr_range[1]
+                                          for addr, _, _ in entry.mem_changes):
+        return False
+    return True
+
+
+def render_text(filepath: str, out, pc_range: Optional[Tuple[int, int]] = None,
+                regs: Optional[Iterable[int]] = None, addr_range: Optional[Tuple[int, int]] = None,
+                symbols=None) -> int:
+    """
+    Escreve o trace no formato texto de save_logs_to_file. Sem filtros, o texto é idêntico
+    ao log da mesma execução.
+
+    Args:
+        filepath: Arquivo do trace
+        out: Destino do texto (arquivo aberto ou sys.stdout)
+        pc_range: Só os ciclos cuja instrução está em [início, fim]
+        regs: Só os ciclos que mudaram algum destes registradores
+        addr_range: Só os ciclos que mudaram algum endereço em [início, fim]
+        symbols: Mapa de símbolos (interpretador.MapaSimbolos) para os rótulos dos PCs
+
+    Returns:
+        Número de ciclos escritos
+    """
+    reader = TraceReader(filepath)
+    formatter = StateLogger(None)
+    formatter.symbols = symbols
+    regs = None if regs is None else set(regs)
+    filtered = pc_range is not None or regs is not None or addr_range is not None
+    written = 0
+    formatter.write_header(out)
+    for entry in reader.entries():
+        if filtered and not _matches(entry, pc_range, regs, addr_range):
+            continue
+        formatter.write_entry(out, entry)
+        written += 1
+    formatter.write_footer(out, reader.cycles)
+    return written
+
+
+def _faixa(texto: str) -> Tuple[int, int]:
+    """Converte 'A:B' (ou só 'A') em (A, B)."""
+    inicio, _, fim = texto.partition(":")
+    return int(inicio), int(fim or inicio)
+
+
+# -----------------------------------------------------------------------------
+# Decodificador de linha de comando
+# -----------------------------------------------------------------------------
+if __name__ == "__main__":
+    import argparse
+    from interpretador import MapaSimbolos
+
+    parser = argparse.ArgumentParser(description="Mostra um trace binário no formato do log em texto.")
+    parser.add_argument("trace", help="arquivo gravado com CPULogged(trace_path=...)")
+    parser.add_argument("--pc", type=_faixa, help="faixa de PC A:B")
+    parser.add_argument("--reg", type=int, action="append", help="registrador (pode repetir)")
+    parser.add_argument("--addr", type=_faixa, help="faixa de endereços A:B")
+    parser.add_argument("--sym", help="mapa de símbolos (.sym) para mostrar os rótulos")
+    args = parser.parse_args()
+    render_text(args.trace, sys.stdout, args.pc, args.reg, args.addr,
+                MapaSimbolos.carregar(args.sym) if args.sym else None)